@@ -0,0 +1,21 @@
+"""
+Request-scoped identity map middleware
+"""
+from services.user_cache import begin_request, end_request
+
+
+class IdentityMapMiddleware:
+    """Give every HTTP request its own user identity map (plain ASGI, so the context reaches the handler)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = begin_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_request(token)
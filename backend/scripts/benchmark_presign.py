@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Presign Microbenchmark
+Compares the per-URL cost of the native R2 presigner (services/r2_presigner.py)
+with boto3's generate_presigned_url, and checks that both produce the same URLs.
+
+Usage:
+    python scripts/benchmark_presign.py [iterations]
+
+Signing is local, so no R2 credentials or network access are needed; the
+real ones from .env are used if present.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from services.r2_presigner import R2Presigner
+
+ACCOUNT_ID = os.getenv('R2_ACCOUNT_ID', 'benchmark-account')
+ACCESS_KEY_ID = os.getenv('R2_ACCESS_KEY_ID', 'benchmark-access-key')
+SECRET_ACCESS_KEY = os.getenv('R2_SECRET_ACCESS_KEY', 'benchmark-secret-key')
+BUCKET_NAME = os.getenv('R2_BUCKET_NAME', 'atomic-rose-tools-bucket')
+
+KEYS = [
+    'products/Atomic Rose - Techno Essentials Vol.1.zip',
+    'samples/kick (120 BPM) #1.wav',
+    'newsletter/gift+bonus.zip',
+    'products/ünïcode ~ pack.zip',
+]
+
+
+def timed(label, count, fn):
+    """Run fn() once and print the cost per URL."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f'   {label:<28} {elapsed * 1e6 / count:8.1f} µs/URL')
+    return elapsed
+
+
+def benchmark_presign(iterations):
+    print('⏱️  Import and client setup...')
+    start = time.perf_counter()
+    import boto3
+    from botocore.config import Config
+    r2_client = boto3.client(
+        's3',
+        endpoint_url=f'https://{ACCOUNT_ID}.r2.cloudflarestorage.com',
+        aws_access_key_id=ACCESS_KEY_ID,
+        aws_secret_access_key=SECRET_ACCESS_KEY,
+        region_name='auto',
+        config=Config(signature_version='s3v4', s3={'addressing_style': 'path'}),
+    )
+    print(f'   {"boto3 import + client":<28} {(time.perf_counter() - start) * 1e3:8.1f} ms')
+    start = time.perf_counter()
+    presigner = R2Presigner(ACCOUNT_ID, ACCESS_KEY_ID, SECRET_ACCESS_KEY, BUCKET_NAME)
+    print(f'   {"native presigner":<28} {(time.perf_counter() - start) * 1e3:8.1f} ms')
+
+    print('')
+    print('🔍 Checking byte-compatibility...')
+    for key in KEYS:
+        expected = r2_client.generate_presigned_url(
+            'get_object', Params={'Bucket': BUCKET_NAME, 'Key': key}, ExpiresIn=3600,
+        )
+        # Sign at the same instant boto3 did
+        amz_date = parse_qs(urlsplit(expected).query)['X-Amz-Date'][0]
+        actual = presigner.presign(key, 3600, now=datetime.strptime(amz_date, '%Y%m%dT%H%M%SZ'))
+        if actual != expected:
+            print(f'   ❌ Mismatch for {key!r}')
+            print(f'      boto3:  {expected}')
+            print(f'      native: {actual}')
+            return False
+    print(f'   ✅ {len(KEYS)} URLs identical')
+
+    count = iterations * len(KEYS)
+    print('')
+    print(f'🏁 Presigning {count} URLs...')
+    boto_time = timed('boto3 generate_presigned_url', count, lambda: [
+        r2_client.generate_presigned_url('get_object', Params={'Bucket': BUCKET_NAME, 'Key': key}, ExpiresIn=3600)
+        for _ in range(iterations) for key in KEYS
+    ])
+    native_time = timed('native presign', count, lambda: [
+        presigner.presign(key, 3600) for _ in range(iterations) for key in KEYS
+    ])
+    batch_time = timed('native presign_many', count, lambda: [
+        presigner.presign_many(KEYS, 3600) for _ in range(iterations)
+    ])
+    print('')
+    print(f'   Speed-up: {boto_time / native_time:.1f}x single, {boto_time / batch_time:.1f}x batched')
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Presign Microbenchmark")
+    print("=" * 50)
+
+    if not benchmark_presign(int(sys.argv[1]) if len(sys.argv) > 1 else 2000):
+        sys.exit(1)
@@ -0,0 +1,178 @@
+"""
+Bestseller ranking materialized from real order data.
+
+Completed `orders` and `guest_orders` are folded, incrementally from a
+watermark, into per-product daily sales (`product_sales_daily`). The top
+products of each rolling window are then materialized in
+`bestseller_rankings` and held in memory, so serving a bestseller list does
+no database work at request time.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+# Rolling windows in days (None = all time)
+WINDOWS: Dict[str, Optional[int]] = {"7d": 7, "30d": 30, "all": None}
+DEFAULT_WINDOW = os.getenv("BESTSELLER_DEFAULT_WINDOW", "30d")
+
+# Document in `bestseller_rankings` holding the incremental watermark
+STATE_ID = "_state"
+EPOCH = datetime(1970, 1, 1)
+
+
+def _sales_pipeline(match: Dict[str, Any], sold_at: Any) -> List[Dict[str, Any]]:
+    """Units sold per (product, day) for the orders matching `match`."""
+    return [
+        {"$match": match},
+        {"$project": {"items": 1, "sold_at": sold_at}},
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": {
+                "product_id": {"$toString": "$items.product_id"},
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$sold_at"}},
+            },
+            "units": {"$sum": {"$ifNull": ["$items.quantity", 1]}},
+        }},
+    ]
+
+
+class BestsellerRanking:
+    """Per-window product rankings by units sold, refreshed from the orders collections."""
+
+    def __init__(self, max_products: int = 100, badge_size: int = 10, settle_seconds: float = 30):
+        self.max_products = max_products
+        self.badge_size = badge_size
+        # Orders newer than this are left for the next refresh (in-flight writes)
+        self.settle_seconds = settle_seconds
+        self._rankings: Dict[str, List[Tuple[str, int]]] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+        self.computed_at: Optional[datetime] = None
+
+    def ready(self, window: str = DEFAULT_WINDOW) -> bool:
+        """True once the window has sales to rank."""
+        return bool(self._rankings.get(window))
+
+    def top(self, window: str = DEFAULT_WINDOW, limit: Optional[int] = None) -> List[str]:
+        """Product ids of a window, best selling first."""
+        ranked = self._rankings.get(window, [])
+        return [product_id for product_id, _ in (ranked[:limit] if limit else ranked)]
+
+    def is_bestseller(self, product_id: str, window: str = DEFAULT_WINDOW) -> bool:
+        """True if the product is in the top `badge_size` of the window."""
+        position = self._positions.get(window, {}).get(str(product_id))
+        return position is not None and position < self.badge_size
+
+    def _set_rankings(self, rankings: Dict[str, List[Tuple[str, int]]]) -> bool:
+        changed = rankings != self._rankings
+        self._rankings = rankings
+        self._positions = {
+            window: {product_id: i for i, (product_id, _) in enumerate(ranked)}
+            for window, ranked in rankings.items()
+        }
+        return changed
+
+    async def load(self, db) -> bool:
+        """Load the materialized rankings; returns True if they changed."""
+        rankings = {window: [] for window in WINDOWS}
+        async for doc in db.bestseller_rankings.find({"_id": {"$in": list(WINDOWS)}}):
+            rankings[doc["_id"]] = [(row["product_id"], row["units"]) for row in doc.get("products", [])]
+            self.computed_at = doc.get("computed_at", self.computed_at)
+        return self._set_rankings(rankings)
+
+    async def _collect_sales(self, db, since: datetime, upto: datetime) -> Dict[Tuple[str, str], int]:
+        """Units sold per (product_id, day) by orders completed in (since, upto]."""
+        window = {"$gt": since, "$lte": upto}
+        # Transferred guest orders are copies of guest_orders already counted below
+        order_rows = db.orders.aggregate(_sales_pipeline(
+            {"status": "completed", "transferred_from_guest": {"$ne": True}, "created_at": window},
+            "$created_at",
+        ))
+        # Guest orders are inserted at checkout and completed later
+        guest_rows = db.guest_orders.aggregate(_sales_pipeline(
+            {"status": "completed", "$or": [
+                {"completed_at": window},
+                {"completed_at": None, "verified_at": window},
+            ]},
+            {"$ifNull": ["$completed_at", "$verified_at"]},
+        ))
+        sales: Dict[Tuple[str, str], int] = {}
+        for rows in (order_rows, guest_rows):
+            async for row in rows:
+                key = (row["_id"]["product_id"], row["_id"]["day"])
+                sales[key] = sales.get(key, 0) + row["units"]
+        return sales
+
+    async def _claim(self, db, since: datetime, upto: datetime) -> bool:
+        """Advance the watermark from `since` to `upto`; False if another process got there first."""
+        try:
+            await db.bestseller_rankings.update_one(
+                {"_id": STATE_ID, "watermark": since},
+                {"$set": {"watermark": upto}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def refresh(self, db, full: bool = False) -> bool:
+        """
+        Fold orders completed since the last refresh into the daily sales,
+        re-materialize every window and reload them. With `full` the daily
+        sales are rebuilt from scratch. Returns True if the rankings changed.
+        """
+        if full:
+            await db.product_sales_daily.delete_many({})
+            await db.bestseller_rankings.delete_one({"_id": STATE_ID})
+
+        state = await db.bestseller_rankings.find_one({"_id": STATE_ID}) or {}
+        since = state.get("watermark", EPOCH)
+        upto = datetime.utcnow() - timedelta(seconds=self.settle_seconds)
+        if upto > since:
+            sales = await self._collect_sales(db, since, upto)
+            if await self._claim(db, since, upto) and sales:
+                await db.product_sales_daily.bulk_write([
+                    UpdateOne(
+                        {"_id": f"{product_id}:{day}"},
+                        {"$inc": {"units": units}, "$setOnInsert": {"product_id": product_id, "day": day}},
+                        upsert=True,
+                    )
+                    for (product_id, day), units in sales.items()
+                ], ordered=False)
+                print(f"📈 Counted {sum(sales.values())} sold items into bestseller ranking")
+
+        await self._materialize(db)
+        return await self.load(db)
+
+    async def _materialize(self, db) -> None:
+        """Recompute the top products of every window from the daily sales."""
+        now = datetime.utcnow()
+        for window, days in WINDOWS.items():
+            pipeline: List[Dict[str, Any]] = []
+            if days is not None:
+                cutoff = (now - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+                pipeline.append({"$match": {"day": {"$gte": cutoff}}})
+            pipeline += [
+                {"$group": {"_id": "$product_id", "units": {"$sum": "$units"}}},
+                {"$sort": {"units": -1, "_id": 1}},
+                {"$limit": self.max_products},
+            ]
+            rows = await db.product_sales_daily.aggregate(pipeline).to_list(length=self.max_products)
+            await db.bestseller_rankings.replace_one(
+                {"_id": window},
+                {
+                    "_id": window,
+                    "products": [{"product_id": row["_id"], "units": row["units"]} for row in rows],
+                    "computed_at": now,
+                },
+                upsert=True,
+            )
+
+
+# Create global instance
+bestseller_ranking = BestsellerRanking(
+    max_products=int(os.getenv("BESTSELLER_MAX_PRODUCTS", "100")),
+    badge_size=int(os.getenv("BESTSELLER_BADGE_SIZE", "10")),
+)
@@ -0,0 +1,94 @@
+"""
+Product ownership ("entitlements").
+
+One document per (user_id, product_id) in the `entitlements` collection,
+backed by a unique index, replaces the ever-growing
+`users.purchased_products` array: ownership checks are a single indexed
+lookup and user documents stay small. `users.purchased_products_count`
+is kept alongside for the profile.
+
+Accounts that have not been migrated yet (scripts/migrate_entitlements.py)
+also read the legacy array, and their count is seeded from its size.
+"""
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Set
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+
+def _oid(value: Any) -> ObjectId:
+    return value if isinstance(value, ObjectId) else ObjectId(str(value))
+
+
+async def grant_entitlements(db, user_id: Any, product_ids: Iterable[Any], source: str,
+                             order_id: Optional[Any] = None) -> int:
+    """Record that a user owns these products; returns how many were new."""
+    user_oid = _oid(user_id)
+    now = datetime.utcnow()
+    product_oids = list({_oid(product_id) for product_id in product_ids})
+    operations = [
+        UpdateOne(
+            {"user_id": user_oid, "product_id": product_oid},
+            {"$setOnInsert": {
+                "user_id": user_oid,
+                "product_id": product_oid,
+                "source": source,
+                "order_id": _oid(order_id) if order_id else None,
+                "created_at": now,
+            }},
+            upsert=True,
+        )
+        for product_oid in product_oids
+    ]
+    if not operations:
+        return 0
+    result = await db.entitlements.bulk_write(operations, ordered=False)
+    granted = result.upserted_count
+    if granted:
+        new_product_oids = [product_oids[index] for index in result.upserted_ids]
+        # Unmigrated accounts start from the size of their legacy array, and products
+        # already listed there are not counted twice
+        await db.users.update_one({"_id": user_oid}, [{"$set": {"purchased_products_count": {"$add": [
+            {"$ifNull": ["$purchased_products_count", {"$size": {"$ifNull": ["$purchased_products", []]}}]},
+            {"$size": {"$setDifference": [new_product_oids, {"$ifNull": ["$purchased_products", []]}]}},
+        ]}}}])
+    return granted
+
+
+async def owns_product(db, user_id: Any, product_id: Any) -> bool:
+    """True if the user owns the product (one indexed lookup)."""
+    user_oid, product_oid = _oid(user_id), _oid(product_id)
+    if await db.entitlements.find_one({"user_id": user_oid, "product_id": product_oid}, {"_id": 1}):
+        return True
+    # Not migrated yet: match inside the legacy array without loading it
+    return await db.users.find_one({"_id": user_oid, "purchased_products": product_oid}, {"_id": 1}) is not None
+
+
+async def owned_product_ids(db, user_id: Any, product_ids: Optional[Iterable[Any]] = None) -> List[ObjectId]:
+    """
+    Products the user owns, oldest purchase first. With `product_ids` only
+    those are checked (e.g. the products shown on a page).
+
+    Until an account is migrated this is the union of its entitlements and
+    the legacy array (legacy purchases after the entitlements).
+    """
+    user_oid = _oid(user_id)
+    query = {"user_id": user_oid}
+    if product_ids is not None:
+        query["product_id"] = {"$in": [_oid(product_id) for product_id in product_ids]}
+    owned = [
+        doc["product_id"]
+        async for doc in db.entitlements.find(query, {"product_id": 1}).sort([("created_at", 1), ("_id", 1)])
+    ]
+
+    user = await db.users.find_one({"_id": user_oid, "purchased_products.0": {"$exists": True}}, {"purchased_products": 1})
+    if user is None:
+        return owned
+    seen: Set[ObjectId] = set(owned)
+    wanted: Optional[Set[ObjectId]] = set(query["product_id"]["$in"]) if product_ids is not None else None
+    for product_oid in user["purchased_products"]:
+        if product_oid not in seen and (wanted is None or product_oid in wanted):
+            seen.add(product_oid)
+            owned.append(product_oid)
+    return owned
@@ -0,0 +1,97 @@
+"""
+Product likes.
+
+One document per (user_id, product_id) in the `likes` collection, backed by
+a unique index, replaces the `users.liked_products` array. A toggle is a
+single `find_one_and_update`: an update pipeline flips `liked`, the upsert
+creates the document on the first like, and the new state comes back from
+the same round trip. Unliking keeps the document with `liked: False`.
+
+scripts/migrate_likes.py must run before this code is deployed: it also
+recounts `products.like_count`. Users that still carry the legacy array
+(written by old instances during the rollout) are moved over on their first
+toggle.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+
+def _oid(value: Any) -> ObjectId:
+    return value if isinstance(value, ObjectId) else ObjectId(str(value))
+
+
+def has_legacy_likes(user_doc: Optional[Dict[str, Any]]) -> bool:
+    """True if the user's likes still live in `users.liked_products`."""
+    return user_doc is not None and "liked_products" in user_doc
+
+
+async def migrate_user_likes(db, user_doc: Dict[str, Any]) -> int:
+    """
+    Move one user's legacy array into the likes collection; returns how many
+    likes were created. The legacy arrays never counted towards
+    `products.like_count`, so each created like is counted here (a later
+    unlike would otherwise take the count below zero).
+    """
+    user_oid = _oid(user_doc["_id"])
+    now = datetime.utcnow()
+    product_oids = list({_oid(product_id) for product_id in user_doc.get("liked_products", [])})
+    operations = [
+        UpdateOne(
+            {"user_id": user_oid, "product_id": product_oid},
+            {"$setOnInsert": {
+                "user_id": user_oid,
+                "product_id": product_oid,
+                "liked": True,
+                "liked_at": now,
+                "updated_at": now,
+            }},
+            upsert=True,
+        )
+        for product_oid in product_oids
+    ]
+    created = 0
+    if operations:
+        result = await db.likes.bulk_write(operations, ordered=False)
+        created = result.upserted_count
+        if result.upserted_ids:
+            await db.products.bulk_write([
+                UpdateOne({"_id": product_oids[index]}, {"$inc": {"like_count": 1}})
+                for index in result.upserted_ids
+            ], ordered=False)
+    await db.users.update_one({"_id": user_oid}, {"$unset": {"liked_products": ""}})
+    return created
+
+
+async def toggle_like(db, user_id: Any, product_id: Any) -> bool:
+    """Flip a user's like of a product in one round trip; returns True if it is now liked."""
+    now = datetime.utcnow()
+    like = await db.likes.find_one_and_update(
+        {"user_id": _oid(user_id), "product_id": _oid(product_id)},
+        [{"$set": {
+            # A missing field means the document was just upserted: the first like
+            "liked": {"$not": [{"$ifNull": ["$liked", False]}]},
+            "liked_at": {"$cond": [{"$ifNull": ["$liked", False]}, "$liked_at", now]},
+            "updated_at": now,
+        }}],
+        upsert=True,
+        projection={"liked": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return like["liked"]
+
+
+async def liked_product_ids(db, user_id: Any, product_ids: Optional[Iterable[Any]] = None) -> List[ObjectId]:
+    """
+    Products the user currently likes, most recent first. With `product_ids`
+    only those are checked (e.g. the products shown on a page).
+    """
+    query = {"user_id": _oid(user_id), "liked": True}
+    if product_ids is not None:
+        query["product_id"] = {"$in": [_oid(product_id) for product_id in product_ids]}
+    return [
+        doc["product_id"]
+        async for doc in db.likes.find(query, {"product_id": 1}).sort([("liked_at", -1), ("_id", -1)])
+    ]
@@ -0,0 +1,98 @@
+"""
+Cache of presigned R2 download URLs.
+
+Signing is deterministic for a given key, signing time and lifetime, so
+instead of re-signing on every request the expiry is rounded up to the end
+of a fixed bucket (`bucket_seconds`): every request for the same object and
+lifetime within one bucket maps to the same expiry instant and reuses one
+signed URL. A URL handed out always has at least the requested lifetime
+(and never less than `min_remaining_seconds`) left, at the cost of living
+up to one bucket longer.
+
+Entries are evicted least recently used first, and dropped once expired.
+"""
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+# S3/R2 reject presigned URLs valid for more than 7 days
+MAX_EXPIRATION_SECONDS = 7 * 24 * 3600
+
+# sign_many(keys, expires_in) -> URLs in the same order
+SignMany = Callable[[List[str], int], List[str]]
+
+
+class PresignedUrlCache:
+    """LRU of signed URLs keyed by (object key, requested lifetime, expiry bucket)."""
+
+    def __init__(self, bucket_seconds: int = 300, min_remaining_seconds: int = 60, max_entries: int = 10000):
+        self.bucket_seconds = max(1, bucket_seconds)
+        self.min_remaining_seconds = min_remaining_seconds
+        self.max_entries = max_entries
+        self._urls: "OrderedDict[Tuple[str, int, int], Tuple[int, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def get(self, key: str, expiration: int, sign_many: SignMany) -> str:
+        """Signed URL for a normalized object key, valid for at least `expiration` seconds."""
+        return self.get_many([key], expiration, sign_many)[0]
+
+    def get_many(self, keys: List[str], expiration: int, sign_many: SignMany) -> List[str]:
+        """
+        Signed URLs for normalized object keys, in input order. The keys that
+        miss are signed in one `sign_many(keys, expires_in)` call.
+        """
+        lifetime = max(expiration, self.min_remaining_seconds)
+        now = time.time()
+        expires_at = math.ceil((now + lifetime) / self.bucket_seconds) * self.bucket_seconds
+        # Signatures count from the whole second they were made in, at or after int(now)
+        expires_in = expires_at - int(now)
+        if expires_in > MAX_EXPIRATION_SECONDS:
+            # Rounding up would exceed the signing limit: sign exactly, uncached
+            self.misses += len(keys)
+            return sign_many(keys, lifetime)
+
+        urls: Dict[str, str] = {}
+        for key in set(keys):
+            entry = self._urls.get((key, lifetime, expires_at))
+            if entry is not None:
+                self._urls.move_to_end((key, lifetime, expires_at))
+                urls[key] = entry[1]
+        self.hits += len(urls)
+
+        missing = list(dict.fromkeys(key for key in keys if key not in urls))
+        if missing:
+            self.misses += len(missing)
+            for key, url in zip(missing, sign_many(missing, expires_in)):
+                urls[key] = url
+                self._urls[(key, lifetime, expires_at)] = (expires_at, url)
+                self._urls.move_to_end((key, lifetime, expires_at))
+            self._evict(now)
+        return [urls[key] for key in keys]
+
+    def _evict(self, now: float) -> None:
+        """Drop least recently used entries over the limit, then expired ones."""
+        while len(self._urls) > self.max_entries:
+            self._urls.popitem(last=False)
+        while self._urls:
+            oldest_key = next(iter(self._urls))
+            if self._urls[oldest_key][0] > now:
+                break
+            del self._urls[oldest_key]
+
+    def clear(self) -> None:
+        """Forget every cached URL (e.g. after rotating R2 credentials)."""
+        self._urls.clear()
+
+
+# Create global instance
+presigned_url_cache = PresignedUrlCache(
+    bucket_seconds=int(os.getenv("PRESIGN_CACHE_BUCKET_SECONDS", "300")),
+    min_remaining_seconds=int(os.getenv("PRESIGN_MIN_REMAINING_SECONDS", "60")),
+    max_entries=int(os.getenv("PRESIGN_CACHE_MAX_ENTRIES", "10000")),
+)
@@ -0,0 +1,222 @@
+"""
+In-process read-through cache for the product catalog.
+
+Formatted product documents ("detail" view) are held by `_id` with a TTL
+and LRU eviction once `max_entries` is reached (slugs resolve to ids through
+`SlugIndex`). Listing results
+are cached per normalized query (as encoded JSON bodies) and dropped
+whenever any product is invalidated.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class ProductCache:
+    """TTL + size-bounded cache of formatted products and listing queries."""
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 1000, max_queries: int = 500,
+                 count_ttl_seconds: float = 30):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_queries = max_queries
+        self.count_ttl_seconds = count_ttl_seconds
+        self._products: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._queries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._counts: Dict[Hashable, Tuple[float, int]] = {}
+        # Bumped on every invalidation so derived caches can tell the catalog changed
+        self.version = 0
+        # Wall-clock time of the last known catalog change (Last-Modified)
+        self.last_modified = time.time()
+        self.hits = 0
+        self.misses = 0
+
+    # ----- single products -----
+
+    def get_by_id(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached product for an id, or None if missing/expired."""
+        entry = self._products.get(product_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, product = entry
+        if expires_at <= time.monotonic():
+            del self._products[product_id]
+            self.misses += 1
+            return None
+        self._products.move_to_end(product_id)
+        self.hits += 1
+        return product
+
+    def put(self, product: Dict[str, Any]) -> None:
+        """Store a formatted product (must carry `id`)."""
+        product_id = product.get("id")
+        if not product_id:
+            return
+        self._products[product_id] = (time.monotonic() + self.ttl_seconds, product)
+        self._products.move_to_end(product_id)
+        while len(self._products) > self.max_entries:
+            self._products.popitem(last=False)
+
+    # ----- listing queries -----
+
+    def get_query(self, key: Hashable) -> Optional[Any]:
+        """Return a cached listing result for a normalized query key."""
+        entry = self._queries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._queries[key]
+            self.misses += 1
+            return None
+        self._queries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put_query(self, key: Hashable, result: Any) -> None:
+        """Cache a listing result under a normalized query key."""
+        self._queries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._queries.move_to_end(key)
+        while len(self._queries) > self.max_queries:
+            self._queries.popitem(last=False)
+
+    # ----- filtered totals -----
+
+    def get_count(self, key: Hashable) -> Optional[int]:
+        """Return a cached total for a normalized filter, or None if missing/expired."""
+        entry = self._counts.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def put_count(self, key: Hashable, total: int) -> None:
+        """Cache a filtered total for a short while (absorbs repeated pagination clicks)."""
+        if len(self._counts) >= self.max_queries:
+            now = time.monotonic()
+            self._counts = {k: v for k, v in self._counts.items() if v[0] > now}
+            if len(self._counts) >= self.max_queries:
+                self._counts.clear()
+        self._counts[key] = (time.monotonic() + self.count_ttl_seconds, total)
+
+    # ----- invalidation -----
+
+    def invalidate(self, product_id: Optional[str] = None) -> None:
+        """
+        Drop a product and every cached listing.
+        With no product id the whole cache is cleared.
+        """
+        if product_id is None:
+            self.clear()
+            return
+        self._products.pop(str(product_id), None)
+        self.invalidate_listings()
+
+    def invalidate_listings(self) -> None:
+        """Drop every cached listing and filtered total, keeping single products."""
+        self._queries.clear()
+        self._counts.clear()
+        self.version += 1
+        self.last_modified = time.time()
+
+    def clear(self) -> None:
+        """Drop everything."""
+        self._products.clear()
+        self._queries.clear()
+        self._counts.clear()
+        self.version += 1
+        self.last_modified = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for the admin/health endpoints."""
+        return {
+            "products": len(self._products),
+            "queries": len(self._queries),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SlugIndex:
+    """
+    slug -> product id map for the whole catalog, with negative caching.
+
+    Loaded at startup and maintained on product writes, so a slug lookup is
+    answered from memory and unknown slugs stop reaching MongoDB for a while.
+    """
+
+    def __init__(self, negative_ttl_seconds: float = 60, max_negative: int = 1000):
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_negative = max_negative
+        self._ids: Dict[str, str] = {}
+        self._slugs_by_id: Dict[str, str] = {}
+        self._missing: Dict[str, float] = {}
+
+    def load(self, pairs: Any) -> None:
+        """Replace the map with (slug, product_id) pairs."""
+        self._ids = {}
+        self._slugs_by_id = {}
+        self._missing = {}
+        for slug, product_id in pairs:
+            self.set(slug, product_id)
+
+    def get(self, slug: str) -> Optional[str]:
+        """Product id for a slug, or None if unknown."""
+        return self._ids.get(slug)
+
+    def has_product(self, product_id: str) -> bool:
+        """True if a product with this id (and a slug) is known."""
+        return str(product_id) in self._slugs_by_id
+
+    def is_missing(self, slug: str) -> bool:
+        """True if the slug was recently looked up and not found."""
+        expires_at = self._missing.get(slug)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._missing[slug]
+            return False
+        return True
+
+    def set(self, slug: Optional[str], product_id: str) -> None:
+        """Record (or move) the slug of a product."""
+        product_id = str(product_id)
+        old_slug = self._slugs_by_id.get(product_id)
+        if old_slug and old_slug != slug and self._ids.get(old_slug) == product_id:
+            del self._ids[old_slug]
+        if slug:
+            self._ids[slug] = product_id
+            self._slugs_by_id[product_id] = slug
+            self._missing.pop(slug, None)
+        else:
+            self._slugs_by_id.pop(product_id, None)
+
+    def remove(self, product_id: str) -> None:
+        """Forget a deleted product."""
+        slug = self._slugs_by_id.pop(str(product_id), None)
+        if slug and self._ids.get(slug) == str(product_id):
+            del self._ids[slug]
+
+    def mark_missing(self, slug: str) -> None:
+        """Negative-cache a slug that matched no product."""
+        if len(self._missing) >= self.max_negative:
+            self._missing.clear()
+        self._missing[slug] = time.monotonic() + self.negative_ttl_seconds
+
+    def clear_missing(self) -> None:
+        """Drop negative entries (a write may have created any slug)."""
+        self._missing.clear()
+
+
+# Create global instances
+product_cache = ProductCache(
+    ttl_seconds=float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "1000")),
+    count_ttl_seconds=float(os.getenv("PRODUCT_COUNT_CACHE_TTL_SECONDS", "30")),
+)
+slug_index = SlugIndex(
+    negative_ttl_seconds=float(os.getenv("PRODUCT_SLUG_NEGATIVE_TTL_SECONDS", "60")),
+)
@@ -0,0 +1,95 @@
+"""
+Write-behind popularity counters for products.
+
+Views, likes and purchases are accumulated in memory per product and
+written periodically as one unordered `bulk_write` of `$inc` operations,
+instead of one update of a hot product document per page view. The buffer
+is keyed by product, so it never holds more entries than the catalog has
+products.
+"""
+from typing import Dict, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Product fields maintained by the buffer
+COUNTER_FIELDS = ("view_count", "like_count", "purchase_count")
+
+
+class ProductCounterBuffer:
+    """In-process buffer of pending product counter increments."""
+
+    def __init__(self):
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self.flushed = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def increment(self, product_id: Optional[str], field: str, amount: int = 1) -> None:
+        """Queue `amount` (may be negative) for a product counter."""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown product counter: {field}")
+        if not product_id or not amount or not ObjectId.is_valid(str(product_id)):
+            return
+        counters = self._pending.setdefault(str(product_id), {})
+        counters[field] = counters.get(field, 0) + amount
+
+    def _merge(self, pending: Dict[str, Dict[str, int]]) -> None:
+        for product_id, counters in pending.items():
+            for field, amount in counters.items():
+                self.increment(product_id, field, amount)
+
+    async def flush(self, db) -> int:
+        """Write every pending increment; returns the number of products updated."""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        batch = [(product_id, counters) for product_id, counters in pending.items() if any(counters.values())]
+        operations = [UpdateOne({"_id": ObjectId(product_id)}, {"$inc": counters}) for product_id, counters in batch]
+        if not operations:
+            return 0
+        try:
+            await db.products.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Only the failed operations are retried; the others were applied
+            self._merge({batch[error["index"]][0]: batch[error["index"]][1] for error in e.details.get("writeErrors", [])})
+            raise
+        except BaseException:
+            # Keep the increments for the next flush rather than losing them, also when
+            # the flush loop is cancelled mid-write at shutdown (the final flush retries them)
+            self._merge(pending)
+            raise
+        self.flushed += len(operations)
+        return len(operations)
+
+
+def is_counter_update(change: Dict) -> bool:
+    """True if a change stream update event only touched counter fields."""
+    description = change.get("updateDescription") or {}
+    updated = description.get("updatedFields") or {}
+    return bool(updated) and not description.get("removedFields") and all(
+        field in COUNTER_FIELDS for field in updated
+    )
+
+
+
+def non_counter_changes_stage() -> Dict:
+    """
+    Change stream `$match` stage with the same rule as `is_counter_update`,
+    so counter flushes are dropped by the server before any full document lookup.
+    """
+    updated_fields = {"$map": {
+        "input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}},
+        "in": "$$this.k",
+    }}
+    return {"$match": {"$expr": {"$not": [{"$and": [
+        {"$eq": ["$operationType", "update"]},
+        {"$gt": [{"$size": updated_fields}, 0]},
+        {"$eq": [{"$size": {"$ifNull": ["$updateDescription.removedFields", []]}}, 0]},
+        {"$setIsSubset": [updated_fields, list(COUNTER_FIELDS)]},
+    ]}]}}}
+
+# Create global instance
+product_counters = ProductCounterBuffer()
@@ -0,0 +1,166 @@
+"""
+Faceted catalog filtering: filter building and facet counts.
+
+The same filter semantics are applied in MongoDB (`build_product_filter`) and
+in memory for ranked search results (`matches_filters` in the search index),
+so a filter combination returns the same products on both paths.
+
+- type / featured / bestseller / new / has_stems: exact match
+- genre: one value is a case-insensitive substring match (legacy behaviour),
+  several values match any of them exactly
+- key, tags: match any of the given values
+- bpm_min / bpm_max, price_min / price_max: inclusive ranges
+"""
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional
+
+# Bucket boundaries for range facets (lower bound inclusive)
+BPM_BUCKETS = [0, 90, 110, 125, 135, 145, 160, 1000]
+PRICE_BUCKETS = [0, 0.01, 10, 20, 30, 50, 1000000]
+
+# Most frequent tags returned in the tags facet
+MAX_TAG_FACETS = 30
+
+
+def split_multi(values: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """Normalize a repeated and/or comma-separated query parameter to a list."""
+    if not values:
+        return None
+    result = [part.strip() for value in values for part in value.split(",") if part.strip()]
+    return result or None
+
+
+def build_product_filter(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """MongoDB filter for the catalog filter parameters (None values are ignored)."""
+    filter_dict: Dict[str, Any] = {}
+    for name in ("type", "featured", "bestseller", "new", "has_stems"):
+        if filters.get(name) is not None:
+            filter_dict[name] = filters[name]
+
+    genres = filters.get("genre")
+    if genres:
+        if len(genres) == 1:
+            filter_dict["genre"] = {"$regex": genres[0], "$options": "i"}
+        else:
+            filter_dict["genre"] = {"$in": genres}
+    if filters.get("key"):
+        filter_dict["key"] = {"$in": filters["key"]}
+    if filters.get("tags"):
+        filter_dict["tags"] = {"$in": filters["tags"]}
+
+    for field in ("bpm", "price"):
+        bounds = {}
+        if filters.get(f"{field}_min") is not None:
+            bounds["$gte"] = filters[f"{field}_min"]
+        if filters.get(f"{field}_max") is not None:
+            bounds["$lte"] = filters[f"{field}_max"]
+        if bounds:
+            filter_dict[field] = bounds
+    return filter_dict
+
+
+def matches_filters(fields: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """In-memory equivalent of `build_product_filter` for one product's fields."""
+    for name in ("type", "featured", "bestseller", "new", "has_stems"):
+        if filters.get(name) is not None and fields.get(name) != filters[name]:
+            return False
+
+    genres = filters.get("genre")
+    if genres:
+        genre = (fields.get("genre") or "")
+        if len(genres) == 1:
+            if genres[0].lower() not in genre.lower():
+                return False
+        elif genre not in genres:
+            return False
+    if filters.get("key") and fields.get("key") not in filters["key"]:
+        return False
+    if filters.get("tags") and not set(fields.get("tags") or []) & set(filters["tags"]):
+        return False
+
+    for field in ("bpm", "price"):
+        low, high = filters.get(f"{field}_min"), filters.get(f"{field}_max")
+        if low is None and high is None:
+            continue
+        value = fields.get(field)
+        if value is None or (low is not None and value < low) or (high is not None and value > high):
+            return False
+    return True
+
+
+def facet_pipeline() -> Dict[str, List[Dict[str, Any]]]:
+    """`$facet` stage body computing every facet over the matched products."""
+    def value_counts(field: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        stages: List[Dict[str, Any]] = []
+        if field == "tags":
+            stages.append({"$unwind": "$tags"})
+        stages += [
+            {"$match": {field: {"$nin": [None, ""]}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ]
+        if limit:
+            stages.append({"$limit": limit})
+        return stages
+
+    def buckets(field: str, boundaries: List[float]) -> List[Dict[str, Any]]:
+        return [{"$bucket": {"groupBy": f"${field}", "boundaries": boundaries, "default": "other",
+                             "output": {"count": {"$sum": 1}}}}]
+
+    return {
+        "key": value_counts("key"),
+        "genre": value_counts("genre"),
+        "tags": value_counts("tags", MAX_TAG_FACETS),
+        "has_stems": [{"$group": {"_id": {"$ifNull": ["$has_stems", False]}, "count": {"$sum": 1}}}],
+        "bpm": buckets("bpm", BPM_BUCKETS),
+        "price": buckets("price", PRICE_BUCKETS),
+    }
+
+
+def _format_buckets(rows: List[Dict[str, Any]], boundaries: List[float]) -> List[Dict[str, Any]]:
+    formatted = []
+    for row in rows:
+        if row["_id"] == "other":
+            continue
+        i = boundaries.index(row["_id"])
+        formatted.append({"min": row["_id"], "max": boundaries[i + 1], "count": row["count"]})
+    return sorted(formatted, key=lambda bucket: bucket["min"])
+
+
+def format_facets(raw: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Turn `$facet` output into the API's facet structure."""
+    facets = {
+        name: [{"value": row["_id"], "count": row["count"]} for row in raw.get(name, [])]
+        for name in ("key", "genre", "tags", "has_stems")
+    }
+    facets["bpm"] = _format_buckets(raw.get("bpm", []), BPM_BUCKETS)
+    facets["price"] = _format_buckets(raw.get("price", []), PRICE_BUCKETS)
+    return facets
+
+
+def count_facets(field_rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Compute the same facets in memory (search results), returning `$facet`-shaped rows."""
+    counters: Dict[str, Dict[Any, int]] = {name: {} for name in ("key", "genre", "tags", "has_stems", "bpm", "price")}
+
+    def bump(name: str, value: Any) -> None:
+        counters[name][value] = counters[name].get(value, 0) + 1
+
+    for fields in field_rows:
+        for name in ("key", "genre"):
+            if fields.get(name):
+                bump(name, fields[name])
+        for tag in set(fields.get("tags") or []):
+            if tag:
+                bump("tags", tag)
+        bump("has_stems", bool(fields.get("has_stems")))
+        for name, boundaries in (("bpm", BPM_BUCKETS), ("price", PRICE_BUCKETS)):
+            value = fields.get(name)
+            i = bisect_right(boundaries, value) - 1 if isinstance(value, (int, float)) else -1
+            bump(name, boundaries[i] if 0 <= i < len(boundaries) - 1 else "other")
+
+    raw = {}
+    for name, counts in counters.items():
+        rows = [{"_id": value, "count": count} for value, count in counts.items()]
+        rows.sort(key=lambda row: (-row["count"], str(row["_id"])))
+        raw[name] = rows[:MAX_TAG_FACETS] if name == "tags" else rows
+    return raw
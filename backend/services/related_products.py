@@ -0,0 +1,44 @@
+"""
+"Customers also bought" recommendations.
+
+The co-purchase neighbours are computed offline by
+`scripts/build_related_products.py` into `product_related`; this module
+keeps them in memory so the request path is a dictionary lookup.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Marker document written by the build script
+META_ID = "_meta"
+
+
+class RelatedProducts:
+    """In-memory product id -> ranked co-purchased product ids."""
+
+    def __init__(self):
+        self._neighbours: Dict[str, List[str]] = {}
+        self.computed_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._neighbours)
+
+    def get(self, product_id: str, limit: Optional[int] = None) -> List[str]:
+        """Co-purchased product ids, most related first (empty if never bought together)."""
+        related = self._neighbours.get(str(product_id), [])
+        return related[:limit] if limit else related
+
+    async def load(self, db) -> bool:
+        """Load the latest build; skipped if it is the one already in memory."""
+        meta = await db.product_related.find_one({"_id": META_ID})
+        if not meta or meta.get("computed_at") == self.computed_at:
+            return False
+        neighbours = {}
+        async for doc in db.product_related.find({"_id": {"$ne": META_ID}}):
+            neighbours[doc["_id"]] = [row["product_id"] for row in doc.get("related", [])]
+        self._neighbours = neighbours
+        self.computed_at = meta.get("computed_at")
+        return True
+
+
+# Create global instance
+related_products = RelatedProducts()
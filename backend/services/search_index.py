@@ -0,0 +1,200 @@
+"""
+In-memory inverted index over the product catalog with BM25 ranking.
+
+Replaces the unanchored `$regex` search in `get_products`: the index is built
+once at startup and kept current one product at a time, so query cost depends
+on the number of matching postings rather than on the size of the collection.
+"""
+import math
+import re
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from services.product_facets import count_facets, matches_filters
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Relative weight of each indexed field (BM25F-style term frequency boost)
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "genre": 1.5,
+    "made_by": 1.5,
+    "description": 1.0,
+}
+
+# Product fields needed to index, filter and map slugs; used as the Mongo projection
+INDEX_PROJECTION = {
+    "title": 1, "description": 1, "tags": 1, "genre": 1, "made_by": 1,
+    "type": 1, "featured": 1, "bestseller": 1, "new": 1, "slug": 1,
+    "bpm": 1, "key": 1, "price": 1, "has_stems": 1,
+}
+
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase a string (or list of strings) and split it into alphanumeric tokens."""
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(item) for item in text if item)
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class ProductSearchIndex:
+    """Tokenized inverted index with BM25 scoring and in-memory filters."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._doc_fields: Dict[str, Dict[str, Any]] = {}
+        self._total_len = 0.0
+        self._sorted_terms: Optional[List[str]] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def build(self, product_docs: List[Dict[str, Any]]) -> None:
+        """Replace the whole index with the given product documents."""
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_len = {}
+        self._doc_fields = {}
+        self._total_len = 0.0
+        self._sorted_terms = None
+        for doc in product_docs:
+            self.add(doc)
+        self.ready = True
+
+    def add(self, product_doc: Dict[str, Any]) -> None:
+        """Index (or re-index) a single product document."""
+        doc_id = str(product_doc.get("_id"))
+        self.remove(doc_id)
+
+        weighted_tf: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(product_doc.get(field)):
+                weighted_tf[token] = weighted_tf.get(token, 0.0) + weight
+
+        doc_len = sum(weighted_tf.values())
+        for term, tf in weighted_tf.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._doc_terms[doc_id] = set(weighted_tf)
+        self._doc_len[doc_id] = doc_len
+        self._total_len += doc_len
+        self._doc_fields[doc_id] = {
+            "type": product_doc.get("type"),
+            "featured": product_doc.get("featured", False),
+            "bestseller": product_doc.get("bestseller", False),
+            "new": product_doc.get("new", False),
+            "has_stems": product_doc.get("has_stems", False),
+            "genre": product_doc.get("genre") or "",
+            "key": product_doc.get("key"),
+            "tags": product_doc.get("tags") or [],
+            "bpm": product_doc.get("bpm"),
+            "price": product_doc.get("price"),
+        }
+        self._sorted_terms = None
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a product from the index if present."""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id, 0.0)
+        self._doc_fields.pop(doc_id, None)
+        self._sorted_terms = None
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        """Vocabulary terms starting with `prefix` (search-as-you-type on the last word)."""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = []
+        i = bisect_left(self._sorted_terms, prefix)
+        while i < len(self._sorted_terms) and self._sorted_terms[i].startswith(prefix):
+            terms.append(self._sorted_terms[i])
+            i += 1
+        return terms
+
+    def _matches_filters(self, doc_id: str, filters: Dict[str, Any]) -> bool:
+        fields = self._doc_fields.get(doc_id)
+        return fields is not None and matches_filters(fields, filters)
+
+    def facets(self, doc_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Facet counts over a set of indexed products (`$facet`-shaped rows)."""
+        return count_facets(self._doc_fields[doc_id] for doc_id in doc_ids if doc_id in self._doc_fields)
+
+    def similar(self, doc_id: str, limit: int = 8) -> List[str]:
+        """
+        Products sharing tags and genre with `doc_id`, most similar first:
+        tag Jaccard similarity, plus a bonus for the same genre and type.
+        """
+        fields = self._doc_fields.get(doc_id)
+        if fields is None:
+            return []
+        tags = set(fields["tags"])
+        genre = fields["genre"].lower()
+        scores = []
+        for other_id, other in self._doc_fields.items():
+            if other_id == doc_id:
+                continue
+            other_tags = set(other["tags"])
+            union = tags | other_tags
+            score = len(tags & other_tags) / len(union) if union else 0.0
+            if genre and other["genre"].lower() == genre:
+                score += 0.5
+            if score and other["type"] == fields["type"]:
+                score += 0.25
+            if score:
+                scores.append((score, other_id))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [other_id for _, other_id in scores[:limit]]
+
+    def search(self, query: str, filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank products for a free-text query.
+
+        Returns (product_id, score) pairs sorted by descending score. `filters`
+        takes the listing endpoint's filter parameters, with the semantics of
+        `services.product_facets`.
+        """
+        tokens = tokenize(query)
+        if not tokens or not self._doc_len:
+            return []
+
+        # The last token may be a partially typed word
+        query_terms: Dict[str, float] = {}
+        for token in tokens[:-1]:
+            query_terms[token] = 1.0
+        for term in self._expand_prefix(tokens[-1]):
+            query_terms[term] = 1.0 if term == tokens[-1] else 0.5
+
+        n_docs = len(self._doc_len)
+        avg_len = self._total_len / n_docs if n_docs else 1.0
+        scores: Dict[str, float] = {}
+        for term, query_weight in query_terms.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + query_weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if filters:
+            scores = {doc_id: score for doc_id, score in scores.items() if self._matches_filters(doc_id, filters)}
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+# Create global instance
+search_index = ProductSearchIndex()
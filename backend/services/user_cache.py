@@ -0,0 +1,131 @@
+"""
+User document caching for authenticated requests.
+
+Two layers keyed by user id (the JWT `sub`):
+
+- a request-scoped identity map, so one request never loads the same user
+  twice (the auth dependency and the handler share the document);
+- a short-TTL process cache, invalidated by this process's writes to the
+  user (profile, likes, purchases, auth state). Other instances see such
+  writes after at most `ttl_seconds`.
+
+`OwnershipCache` additionally keeps each user's purchased/liked product ids
+as sets for bulk ownership checks.
+
+Cached documents are shared: callers must not mutate them.
+"""
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+# Set per request by middleware.identity_map.IdentityMapMiddleware
+_request_users: ContextVar[Optional[Dict[str, Dict[str, Any]]]] = ContextVar("request_users", default=None)
+
+
+def request_identity_map() -> Optional[Dict[str, Dict[str, Any]]]:
+    """Users already loaded by the current request (None outside a request)."""
+    return _request_users.get()
+
+
+def begin_request():
+    """Start an empty identity map; returns the token for `end_request`."""
+    return _request_users.set({})
+
+
+def end_request(token) -> None:
+    """Discard the identity map of the finished request."""
+    _request_users.reset(token)
+
+
+class UserCache:
+    """TTL + size-bounded cache of user documents by id."""
+
+    def __init__(self, ttl_seconds: float = 30, max_entries: int = 5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._users: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Cached user document, from the request identity map first."""
+        identity_map = request_identity_map()
+        if identity_map is not None and user_id in identity_map:
+            return identity_map[user_id]
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user_doc = entry
+        if expires_at <= time.monotonic():
+            del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        if identity_map is not None:
+            identity_map[user_id] = user_doc
+        return user_doc
+
+    def put(self, user_id: str, user_doc: Dict[str, Any]) -> None:
+        """Cache a freshly loaded user document."""
+        identity_map = request_identity_map()
+        if identity_map is not None:
+            identity_map[user_id] = user_doc
+        self._users[user_id] = (time.monotonic() + self.ttl_seconds, user_doc)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+
+    def invalidate(self, user_id: Any) -> None:
+        """Forget a user after a write (also for the rest of the current request)."""
+        user_id = str(user_id)
+        self._users.pop(user_id, None)
+        identity_map = request_identity_map()
+        if identity_map is not None:
+            identity_map.pop(user_id, None)
+
+
+class OwnershipCache:
+    """
+    Per-user sets of purchased and liked product ids, so "which of these
+    do I own/like" for a whole product grid is answered from memory.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_users: int = 5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._sets: "OrderedDict[str, Tuple[float, FrozenSet[str], FrozenSet[str]]]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[Tuple[FrozenSet[str], FrozenSet[str]]]:
+        """(purchased, liked) product id sets, or None if missing/expired."""
+        entry = self._sets.get(user_id)
+        if entry is None:
+            return None
+        expires_at, purchased, liked = entry
+        if expires_at <= time.monotonic():
+            del self._sets[user_id]
+            return None
+        self._sets.move_to_end(user_id)
+        return purchased, liked
+
+    def put(self, user_id: str, purchased: Iterable[str], liked: Iterable[str]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """Cache a user's product id sets."""
+        entry = (time.monotonic() + self.ttl_seconds, frozenset(purchased), frozenset(liked))
+        self._sets[user_id] = entry
+        self._sets.move_to_end(user_id)
+        while len(self._sets) > self.max_users:
+            self._sets.popitem(last=False)
+        return entry[1], entry[2]
+
+    def invalidate(self, user_id: Any) -> None:
+        """Forget a user's sets after a like or purchase."""
+        self._sets.pop(str(user_id), None)
+
+
+# Create global instances
+user_cache = UserCache(
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "30")),
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "5000")),
+)
+ownership_cache = OwnershipCache(
+    ttl_seconds=float(os.getenv("OWNERSHIP_CACHE_TTL_SECONDS", "60")),
+    max_users=int(os.getenv("USER_CACHE_MAX_ENTRIES", "5000")),
+)
@@ -5,25 +5,24 @@ No Beanie ODM - just direct MongoDB queries with proper data conversion.
 """
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, status, Depends, Request
+from typing import List, Optional, Dict, Any, Set
+from fastapi import FastAPI, HTTPException, status, Depends, Request, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from motor.motor_asyncio import AsyncIOMotorClient
-from bson import ObjectId
+from bson import ObjectId, json_util
 import os
 from dotenv import load_dotenv
 import hashlib
 import secrets
 from jose import jwt
 from passlib.context import CryptContext
-import boto3
-from botocore.exceptions import ClientError
-from botocore.config import Config
-from urllib.parse import urlparse, unquote
+from pymongo.errors import OperationFailure
+from urllib.parse import urlparse, unquote, quote
 import time
 import httpx
 
@@ -61,6 +60,9 @@ JWT_SECRET = os.getenv("JWT_SECRET", "your-super-secret-jwt-key-change-this-in-p
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Maintenance endpoints (cache, ranking) require this value in the X-Admin-Token header; unset disables them
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
 # Download Configuration
 MAX_DOWNLOADS_PER_USER = 3  # Total downloads allowed per user
 
@@ -70,6 +72,10 @@ R2_SECRET_ACCESS_KEY = os.getenv("R2_SECRET_ACCESS_KEY")
 R2_BUCKET_NAME = os.getenv("R2_BUCKET_NAME", "atomic-rose-tools-bucket")
 R2_ACCOUNT_ID = os.getenv("R2_ACCOUNT_ID")
 R2_PUBLIC_URL = os.getenv("R2_PUBLIC_URL", "https://pub-9c5bbe78ba1841d88724531ea527bb7d.r2.dev")
+# Objects under these prefixes are served from R2_PUBLIC_URL instead of being presigned
+R2_PUBLIC_PREFIXES = tuple(
+    prefix.strip() for prefix in os.getenv("R2_PUBLIC_PREFIXES", "freebies/,images/,mp3/").split(",") if prefix.strip()
+)
 
 # Google OAuth Configuration
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -81,38 +87,61 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Security
 security = HTTPBearer()
+# Public endpoints that personalize their response when a token is sent
+optional_security = HTTPBearer(auto_error=False)
 
-# R2 Client
-r2_client = None
+# R2 presigner (plain SigV4; boto3 is only loaded by the maintenance scripts)
+from services.r2_presigner import R2Presigner
+r2_presigner = None
 if R2_ACCESS_KEY_ID and R2_SECRET_ACCESS_KEY and R2_ACCOUNT_ID:
-    try:
-        r2_client = boto3.client(
-            "s3",
-            endpoint_url=f"https://{R2_ACCOUNT_ID}.r2.cloudflarestorage.com",
-            aws_access_key_id=R2_ACCESS_KEY_ID,
-            aws_secret_access_key=R2_SECRET_ACCESS_KEY,
-            region_name="auto",
-            config=Config(
-                signature_version="s3v4",
-                s3={"addressing_style": "path"},
-                retries={"max_attempts": 3, "mode": "standard"},
-            ),
-        )
-        print("✅ R2 client initialized successfully (s3v4, path-style)")
-    except Exception as e:
-        print(f"❌ Failed to initialize R2 client: {e}")
-        r2_client = None
+    r2_presigner = R2Presigner(R2_ACCOUNT_ID, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, R2_BUCKET_NAME)
+    print("✅ R2 presigner initialized successfully (s3v4, path-style)")
 else:
     print("⚠️  R2 credentials not found - download functionality disabled")
 
+# Product catalog cache, slug map and search index (imported after load_dotenv so their env settings apply)
+from services.product_cache import product_cache, slug_index
+from services.search_index import search_index, INDEX_PROJECTION
+from services.product_facets import split_multi, build_product_filter, facet_pipeline, format_facets
+from services.product_counters import product_counters, is_counter_update, non_counter_changes_stage
+from services.related_products import related_products
+from services.user_cache import user_cache, ownership_cache
+from services.entitlements import grant_entitlements, owns_product, owned_product_ids
+from services.presigned_urls import presigned_url_cache
+from services.likes import has_legacy_likes, migrate_user_likes, toggle_like, liked_product_ids
+from services.bestseller_ranking import bestseller_ranking, WINDOWS as BESTSELLER_WINDOWS, DEFAULT_WINDOW as BESTSELLER_DEFAULT_WINDOW
+from utils.pagination import paginate, paginate_with_total
+from utils.slug import extract_id_from_slug
+from utils.responses import FastJSONResponse, encode_json, decode_json, json_bytes_response
+from utils.http_cache import (
+    CATALOG_SURROGATE_KEY, product_surrogate_key, make_etag, etag_matches,
+    catalog_headers, purge_surrogate_keys
+)
+
 # Global database connection
 db_client = None
 db = None
+product_watch_task = None
+bestseller_task = None
+counter_flush_task = None
+related_reload_task = None
+# Fire-and-forget tasks (CDN purges), referenced until they finish so they aren't garbage collected
+background_tasks: Set[asyncio.Task] = set()
+
+# How often sales from new orders are folded into the bestseller ranking
+BESTSELLER_REFRESH_SECONDS = int(os.getenv("BESTSELLER_REFRESH_SECONDS", "300"))
+
+# How often buffered view/like/purchase counts are written to the products
+PRODUCT_COUNTER_FLUSH_SECONDS = float(os.getenv("PRODUCT_COUNTER_FLUSH_SECONDS", "30"))
+
+# How often to check for a new build of the related products (scripts/build_related_products.py)
+RELATED_PRODUCTS_RELOAD_SECONDS = int(os.getenv("RELATED_PRODUCTS_RELOAD_SECONDS", "600"))
 
 app = FastAPI(
     title="Atomic Rose Tools API",
     description="Simple API for Atomic Rose Tools music store",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure rate limiter with memory storage
@@ -120,6 +149,10 @@ limiter = Limiter(key_func=get_remote_address, storage_uri="memory://")
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# One user identity map per request (see load_user)
+from middleware.identity_map import IdentityMapMiddleware
+app.add_middleware(IdentityMapMiddleware)
+
 # Add CORS middleware - more permissive for development
 app.add_middleware(
     CORSMiddleware,
@@ -132,7 +165,7 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     """Connect to MongoDB on startup"""
-    global db_client, db, mongodb_connected
+    global db_client, db, mongodb_connected, product_watch_task, bestseller_task, counter_flush_task, related_reload_task
     try:
         print("🔄 Connecting to MongoDB...")
         
@@ -156,6 +189,20 @@ async def startup_event():
         mongodb_connected = True
         print("✅ Successfully connected to MongoDB")
         
+        await build_search_index()
+        
+        # Keep the product cache in sync with writes made outside this process
+        product_watch_task = asyncio.create_task(watch_product_changes())
+        
+        # Bestsellers are ranked from order data in the background and served from memory
+        bestseller_task = asyncio.create_task(refresh_bestsellers_periodically())
+        
+        # Popularity counters are buffered in memory and written in batches
+        counter_flush_task = asyncio.create_task(flush_product_counters_periodically())
+        
+        # "Customers also bought" lists are built offline and served from memory
+        related_reload_task = asyncio.create_task(reload_related_products_periodically())
+        
     except Exception as e:
         mongodb_connected = False
         print(f"❌ Failed to connect to MongoDB: {e}")
@@ -165,14 +212,294 @@ async def startup_event():
 async def shutdown_event():
     """Close MongoDB connection on shutdown"""
     global db_client
+    if product_watch_task:
+        product_watch_task.cancel()
+    if bestseller_task:
+        bestseller_task.cancel()
+    if counter_flush_task:
+        counter_flush_task.cancel()
+        # Let an interrupted flush put its increments back before the final flush below
+        await asyncio.gather(counter_flush_task, return_exceptions=True)
+    if related_reload_task:
+        related_reload_task.cancel()
     if db_client:
+        # Write whatever the counter buffer still holds before disconnecting
+        await flush_product_counters()
         db_client.close()
         print("🔌 MongoDB connection closed")
 
-def format_product_for_frontend(product_doc: Dict[str, Any]) -> Dict[str, Any]:
+def run_in_background(coro) -> asyncio.Task:
+    """Start a fire-and-forget task; it is kept referenced until done and its failure is logged"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_task_done)
+    return task
+
+def background_task_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        print(f"⚠️ Background task failed: {task.exception()!r}")
+
+# "The $changeStream stage is only supported on replica sets"
+NOT_A_REPLICA_SET_ERROR = 40573
+
+async def watch_product_changes():
     """
-    Convert MongoDB product document to frontend format.
-    Matches the new validation rules structure.
+    Invalidate cached products from the MongoDB change stream.
+    Change streams need a replica set (Atlas); on a standalone server we
+    fall back to the cache TTL and a periodic search index rebuild.
+    """
+    resumed = False
+    retry_delay = 5
+    while True:
+        try:
+            # Counter-only updates are filtered on the server, before the full document lookup
+            async with db.products.watch([non_counter_changes_stage()], full_document="updateLookup") as stream:
+                # Anything written while we were not listening is unknown
+                product_cache.clear()
+                if resumed:
+                    await build_search_index()
+                resumed = True
+                retry_delay = 5
+                print("👀 Watching product changes for cache invalidation")
+                async for change in stream:
+                    operation = change.get("operationType")
+                    if operation == "update" and is_counter_update(change):
+                        # Counter flushes don't change anything cached beyond popularity numbers
+                        # (normally already dropped by the server-side stage)
+                        continue
+                    if operation in ("insert", "update", "replace", "delete"):
+                        product_id = str(change["documentKey"]["_id"])
+                        index_product_doc(product_id, change.get("fullDocument"))
+                    else:
+                        product_cache.clear()
+                        await build_search_index()
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code != NOT_A_REPLICA_SET_ERROR:
+                print(f"⚠️ Product change stream failed, retrying in {retry_delay}s: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+                continue
+            print(f"⚠️ Product change stream unavailable, relying on cache TTL: {e}")
+            await rebuild_search_index_periodically()
+            return
+        except Exception as e:
+            print(f"⚠️ Product change stream interrupted, retrying in {retry_delay}s: {e}")
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 60)
+
+async def rebuild_search_index_periodically():
+    """Fallback without a change stream: rebuild the search index and slug map once per cache TTL"""
+    while True:
+        await asyncio.sleep(product_cache.ttl_seconds)
+        await build_search_index()
+
+async def refresh_bestsellers(full: bool = False) -> bool:
+    """Fold new orders into the bestseller ranking; drop cached listings if the ranking moved"""
+    changed = await bestseller_ranking.refresh(db, full=full)
+    if changed:
+        product_cache.clear()
+        run_in_background(purge_surrogate_keys([CATALOG_SURROGATE_KEY]))
+        print(f"🏆 Bestseller ranking updated ({len(bestseller_ranking.top())} products in {BESTSELLER_DEFAULT_WINDOW})")
+    return changed
+
+async def refresh_bestsellers_periodically():
+    """Background loop keeping the bestseller ranking current"""
+    while True:
+        try:
+            await refresh_bestsellers()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Failed to refresh bestseller ranking: {e}")
+        await asyncio.sleep(BESTSELLER_REFRESH_SECONDS)
+
+async def flush_product_counters():
+    """Write buffered product counter increments in one bulk_write"""
+    try:
+        updated = await product_counters.flush(db)
+        if updated:
+            print(f"📊 Flushed counters for {updated} products")
+    except Exception as e:
+        print(f"⚠️ Failed to flush product counters: {e}")
+
+async def flush_product_counters_periodically():
+    """Background loop draining the product counter buffer"""
+    while True:
+        await asyncio.sleep(PRODUCT_COUNTER_FLUSH_SECONDS)
+        await flush_product_counters()
+
+async def reload_related_products_periodically():
+    """Background loop picking up new builds of the co-purchase recommendations"""
+    while True:
+        try:
+            if await related_products.load(db):
+                print(f"🛒 Loaded related products for {len(related_products)} products")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Failed to load related products: {e}")
+        await asyncio.sleep(RELATED_PRODUCTS_RELOAD_SECONDS)
+
+def record_purchases(items: List[Dict[str, Any]]):
+    """Count purchased order items towards each product's purchase_count"""
+    for item in items:
+        product_counters.increment(str(item.get("product_id")), "purchase_count", item.get("quantity", 1))
+
+# Upper bound on ids/slugs resolved by one batch request
+MAX_BATCH_PRODUCTS = 100
+
+async def load_products_batch(product_refs: List[Any], projection: Optional[Dict[str, Any]] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Resolve product ids and/or slugs with a single $in query.
+    Returns one document per ref, in input order (None where nothing matched).
+    """
+    refs = [str(ref) for ref in product_refs]
+    # Normalized through ObjectId so uppercase hex ids match the str(_id) keys below
+    ref_ids = [
+        str(ObjectId(product_id)) if product_id else None
+        for product_id in (extract_id_from_slug(ref) or slug_index.get(ref) for ref in refs)
+    ]
+    ids = {product_id for product_id in ref_ids if product_id}
+    slugs = {ref for ref, product_id in zip(refs, ref_ids) if not product_id}
+    
+    clauses = []
+    if ids:
+        clauses.append({"_id": {"$in": [ObjectId(product_id) for product_id in ids]}})
+    if slugs:
+        clauses.append({"slug": {"$in": list(slugs)}})
+    if not clauses:
+        return []
+    
+    docs_by_id, docs_by_slug = {}, {}
+    async for doc in db.products.find(clauses[0] if len(clauses) == 1 else {"$or": clauses}, projection):
+        docs_by_id[str(doc["_id"])] = doc
+        if doc.get("slug"):
+            docs_by_slug[doc["slug"]] = doc
+    return [docs_by_id.get(product_id) if product_id else docs_by_slug.get(ref) for ref, product_id in zip(refs, ref_ids)]
+
+async def fetch_ranked_products(product_ids: List[str], filter_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Card-projected products for ranked ids matching `filter_dict`, in ranking order"""
+    oids = [ObjectId(product_id) for product_id in product_ids if ObjectId.is_valid(product_id)]
+    if not oids:
+        return []
+    query = {"$and": [filter_dict, {"_id": {"$in": oids}}]} if filter_dict else {"_id": {"$in": oids}}
+    products_by_id = {}
+    async for product in db.products.find(query, PRODUCT_PROJECTIONS["card"]):
+        products_by_id[product["_id"]] = product
+    return [products_by_id[oid] for oid in oids if oid in products_by_id]
+
+async def build_search_index():
+    """(Re)build the in-memory product search index and slug map from MongoDB"""
+    try:
+        product_docs = await db.products.find({}, INDEX_PROJECTION).to_list(length=None)
+        search_index.build(product_docs)
+        slug_index.load((doc.get("slug"), doc["_id"]) for doc in product_docs)
+        print(f"🔎 Search index built for {len(search_index)} products")
+    except Exception as e:
+        print(f"⚠️ Failed to build search index, falling back to regex search: {e}")
+
+def index_product_doc(product_id: str, product_doc: Optional[Dict[str, Any]]):
+    """Apply one product write (None = deleted) to the cache, search index, slug map and CDN"""
+    product_cache.invalidate(product_id=product_id)
+    run_in_background(purge_surrogate_keys([CATALOG_SURROGATE_KEY, product_surrogate_key(product_id)]))
+    slug_index.clear_missing()
+    if product_doc:
+        search_index.add(product_doc)
+        slug_index.set(product_doc.get("slug"), product_id)
+    else:
+        search_index.remove(product_id)
+        slug_index.remove(product_id)
+
+async def refresh_product(product_id: str):
+    """Explicit invalidation hook: drop cached copies of a product and re-index it"""
+    product_doc = await db.products.find_one({"_id": ObjectId(product_id)}, INDEX_PROJECTION)
+    index_product_doc(product_id, product_doc)
+
+def cache_catalog_body(cache_key: tuple, content: Any, surrogate_keys: List[str]) -> tuple:
+    """Encode a catalog response once and cache it with its ETag and surrogate keys"""
+    body = encode_json(content)
+    entry = (body, make_etag(body), surrogate_keys)
+    product_cache.put_query(cache_key, entry)
+    return entry
+
+def catalog_response(request: Optional[Request], entry: tuple) -> Response:
+    """Send a cached catalog body, or 304 if the client already has this version"""
+    body, etag, surrogate_keys = entry
+    public = request is None or "authorization" not in request.headers
+    headers = catalog_headers(etag, surrogate_keys, product_cache.last_modified, public=public)
+    if request is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return json_bytes_response(body, headers=headers)
+
+async def personalized_catalog_response(request: Optional[Request], entry: tuple, viewer_id: Optional[str]) -> Response:
+    """
+    Send a shared catalog body, adding is_liked / is_purchased for a signed-in viewer.
+    The base body still comes from the anonymous cache; only the flags are per user.
+    """
+    if not viewer_id or db is None:
+        return catalog_response(request, entry)
+    purchased, liked = await load_product_sets(viewer_id)
+    content = decode_json(entry[0])
+    products = content["products"] if "products" in content else [content]
+    for product in products:
+        product["is_liked"] = product.get("id") in liked
+        product["is_purchased"] = product.get("id") in purchased
+    body = encode_json(content)
+    return catalog_response(request, (body, make_etag(body), entry[2]))
+
+async def resolve_product(product_ref: str) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a slug or ObjectId string to a formatted product.
+    Decides slug vs ID up front, so a lookup costs at most one indexed query.
+    """
+    product_id = extract_id_from_slug(product_ref) or slug_index.get(product_ref)
+    if product_id:
+        product = product_cache.get_by_id(product_id)
+        if product:
+            return product
+        product_doc = await db.products.find_one({"_id": ObjectId(product_id)}, PRODUCT_PROJECTIONS["detail"])
+    else:
+        if slug_index.is_missing(product_ref):
+            return None
+        product_doc = await db.products.find_one({"slug": product_ref}, PRODUCT_PROJECTIONS["detail"])
+    
+    if not product_doc:
+        if not product_id:
+            slug_index.mark_missing(product_ref)
+        return None
+    
+    product = format_product_for_frontend(product_doc)
+    product_cache.put(product)
+    slug_index.set(product.get("slug"), product["id"])
+    return product
+
+# Card descriptions are cut server-side; the grid clamps them to a few lines anyway
+CARD_DESCRIPTION_LENGTH = 300
+
+# Named projections for product documents: "card" for listing grids, "detail" for the product page
+PRODUCT_PROJECTIONS = {
+    "card": {
+        "sku": 1, "title": 1, "price": 1, "original_price": 1, "discount_percentage": 1,
+        "bpm": 1, "key": 1, "genre": 1, "tags": 1, "sample_count": 1, "total_duration": 1,
+        "formats": 1, "total_size": 1, "cover_image_url": 1, "preview_audio_url": 1,
+        "featured": 1, "bestseller": 1, "new": 1, "has_stems": 1, "slug": 1,
+        "view_count": 1, "like_count": 1, "purchase_count": 1, "is_free": 1, "made_by": 1,
+        "created_at": 1, "release_date": 1,
+        "description": {"$substrCP": [{"$ifNull": ["$description", ""]}, 0, CARD_DESCRIPTION_LENGTH]}
+    },
+    "detail": None,  # full document: sample_files, contents and file_path are needed here
+    "profile": {
+        "title": 1, "artist": 1, "price": 1, "description": 1, "cover_image_url": 1, "type": 1, "created_at": 1
+    }
+}
+
+def format_product_card(product_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a product document fetched with the "card" projection to frontend format.
+    Used by listing endpoints; leaves out the heavy detail-only fields.
     """
     return {
         "id": str(product_doc.get("_id")),
@@ -193,10 +520,9 @@ def format_product_for_frontend(product_doc: Dict[str, Any]) -> Dict[str, Any]:
         "cover_image_url": product_doc.get("cover_image_url"),
         "preview_audio_url": product_doc.get("preview_audio_url"),
         "featured": product_doc.get("featured", False),
-        "bestseller": product_doc.get("bestseller", False),
+        "bestseller": product_doc.get("bestseller", False) or bestseller_ranking.is_bestseller(product_doc.get("_id")),
         "new": product_doc.get("new", False),
         "has_stems": product_doc.get("has_stems", False),
-        "contents": product_doc.get("contents", []),
         "slug": product_doc.get("slug"),
         "view_count": product_doc.get("view_count", 0),
         "like_count": product_doc.get("like_count", 0),
@@ -204,13 +530,48 @@ def format_product_for_frontend(product_doc: Dict[str, Any]) -> Dict[str, Any]:
         "is_free": product_doc.get("is_free", False),
         "made_by": product_doc.get("made_by"),
         "artist": product_doc.get("made_by"),  # Map made_by to artist for frontend compatibility
-        "file_path": product_doc.get("file_path"),  # Add file_path for download links
-        "sample_files": product_doc.get("sample_files", []),  # Add sample_files for previews
         "created_at": product_doc.get("created_at").isoformat() if product_doc.get("created_at") else None,
         "release_date": product_doc.get("release_date").isoformat() if product_doc.get("release_date") else None,
         "savings": product_doc.get("original_price", 0) - product_doc.get("price", 0) if product_doc.get("original_price") and product_doc.get("original_price") > product_doc.get("price", 0) else 0
     }
 
+def format_product_for_frontend(product_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert MongoDB product document to frontend format ("detail" view).
+    Matches the new validation rules structure.
+    """
+    product = format_product_card(product_doc)
+    product.update({
+        "contents": product_doc.get("contents", []),
+        "file_path": product_doc.get("file_path"),  # Add file_path for download links
+        "sample_files": product_doc.get("sample_files", []),  # Add sample_files for previews
+    })
+    return product
+
+def format_profile_product(product_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a product document fetched with the "profile" projection for the profile lists"""
+    return {
+        "id": str(product_doc["_id"]),
+        "title": product_doc.get("title", "Unknown Product"),
+        "artist": product_doc.get("artist", "Unknown Artist"),
+        "price": product_doc.get("price", 0),
+        "description": product_doc.get("description", ""),
+        "cover_image_url": product_doc.get("cover_image_url", "/images/placeholder-product.jpg"),
+        "type": product_doc.get("type", "sample-pack"),
+        "created_at": product_doc.get("created_at", datetime.utcnow()).isoformat()
+    }
+
+def format_entitlement_for_frontend(entitlement_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an entitlement document to frontend format"""
+    return {
+        "id": str(entitlement_doc["_id"]),
+        "user_id": str(entitlement_doc.get("user_id")),
+        "product_id": str(entitlement_doc.get("product_id")),
+        "source": entitlement_doc.get("source"),
+        "order_id": str(entitlement_doc["order_id"]) if entitlement_doc.get("order_id") else None,
+        "created_at": entitlement_doc.get("created_at").isoformat() if entitlement_doc.get("created_at") else None
+    }
+
 def format_user_for_frontend(user_doc: Dict[str, Any]) -> Dict[str, Any]:
     """
     Convert MongoDB user document to frontend format.
@@ -233,7 +594,7 @@ def format_user_for_frontend(user_doc: Dict[str, Any]) -> Dict[str, Any]:
         "last_login": user_doc.get("last_login").isoformat() if user_doc.get("last_login") else None,
         "liked_products": liked_products_str,
         "liked_products_count": len(liked_products),
-        "purchased_products_count": len(user_doc.get("purchased_products", [])),
+        "purchased_products_count": user_doc.get("purchased_products_count", len(user_doc.get("purchased_products", []))),
         # Add billing address and personal information
         "billing_address": user_doc.get("billing_address", {}),
         "company_name": user_doc.get("company_name"),
@@ -314,13 +675,78 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    # Get user from database - convert string ID to ObjectId
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    # Get user from the request identity map, the short-TTL cache or the database
+    user = await load_user(user_id)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
     
     return format_user_for_frontend(user)
 
+async def get_optional_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[str]:
+    """User id from an optional bearer token; missing or invalid tokens mean an anonymous request"""
+    if credentials is None:
+        return None
+    try:
+        return verify_token(credentials.credentials).get("sub")
+    except HTTPException:
+        return None
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard for maintenance endpoints: the X-Admin-Token header must match ADMIN_API_TOKEN"""
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+async def load_user(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    User document by id, loaded at most once per request and cached briefly across requests.
+    Writers must call user_cache.invalidate(user_id). The returned document is shared: don't mutate it.
+    """
+    user = user_cache.get(user_id)
+    if user is None:
+        # Ownership lives in the entitlements collection; of the legacy array only its size is needed,
+        # as the count of accounts that have not been migrated yet
+        users = await db.users.aggregate([
+            {"$match": {"_id": ObjectId(user_id)}},
+            {"$addFields": {"purchased_products_count": {"$ifNull": [
+                "$purchased_products_count", {"$size": {"$ifNull": ["$purchased_products", []]}}
+            ]}}},
+            {"$project": {"purchased_products": 0}}
+        ]).to_list(length=1)
+        user = users[0] if users else None
+        if user is not None:
+            user_cache.put(user_id, user)
+    return user
+
+async def load_product_sets(user_id: str) -> tuple:
+    """(purchased, liked) product id sets of a user, from the ownership cache or one entitlements query"""
+    cached = ownership_cache.get(user_id)
+    if cached is not None:
+        return cached
+    purchased = [str(product_id) for product_id in await owned_product_ids(db, user_id)]
+    liked = [str(product_id) for product_id in await load_liked_product_ids(user_id)]
+    return ownership_cache.put(user_id, purchased, liked)
+
+async def load_liked_product_ids(user_id: str) -> List[ObjectId]:
+    """Ids of the products a user likes, from the likes collection or a not yet migrated legacy array"""
+    user = await load_user(user_id)
+    if has_legacy_likes(user):
+        return list(user["liked_products"])
+    return await liked_product_ids(db, user_id)
+
+async def attach_liked_products(user_response: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill a formatted user's liked_products from the likes collection"""
+    _, liked = await load_product_sets(user_response["id"])
+    user_response["liked_products"] = list(liked)
+    user_response["liked_products_count"] = len(liked)
+    return user_response
+
+def invalidate_user_products(user_id: str):
+    """Drop cached copies of a user after a like or purchase"""
+    user_cache.invalidate(user_id)
+    ownership_cache.invalidate(user_id)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -367,6 +793,7 @@ async def fix_r2_paths():
                     {"_id": product["_id"]},
                     {"$set": {"file_path": new_file_path}}
                 )
+                await refresh_product(product_id)
                 print(f"✅ Updated {title}: {current_file_path} → {new_file_path}")
                 updated_count += 1
         
@@ -380,6 +807,32 @@ async def fix_r2_paths():
         print(f"❌ Error fixing R2 paths: {e}")
         raise HTTPException(status_code=500, detail="Failed to fix R2 paths")
 
+@app.post("/api/v1/admin/cache/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_product_cache(payload: Optional[dict] = None):
+    """
+    Invalidate one cached product (by product_id or slug) or the whole catalog cache.
+    Product writes are picked up by the change stream; this is for manual fixes only.
+    """
+    payload = payload or {}
+    product_id = payload.get("product_id")
+    slug = payload.get("slug")
+    if slug and not product_id:
+        product_id = slug_index.get(slug)
+    if product_id and ObjectId.is_valid(product_id):
+        await refresh_product(product_id)
+    elif slug:
+        # Unknown slug: no cached product to drop, but listings may still show it
+        product_cache.invalidate_listings()
+        slug_index.clear_missing()
+    else:
+        product_cache.clear()
+        await build_search_index()
+    return {
+        "success": True,
+        "message": "Product cache invalidated",
+        "cache": product_cache.stats()
+    }
+
 @app.post("/api/v1/test-email")
 async def test_email(test_data: dict):
     """Test email sending endpoint"""
@@ -470,6 +923,7 @@ async def register(request: Request, user_data: dict):
                         }
                     }
                 )
+                user_cache.invalidate(existing_user["_id"])
                 
                 # Send new verification email
                 try:
@@ -551,8 +1005,7 @@ async def register(request: Request, user_data: dict):
             "name": name,
             "avatar_url": None,
             "bio": None,
-            "liked_products": [],
-            "purchased_products": [],
+            "purchased_products_count": 0,
             "failed_login_attempts": 0,
             "account_locked_until": None,
             "password_changed_at": datetime.utcnow(),
@@ -668,12 +1121,13 @@ async def login(request: Request, credentials: dict):
             {"_id": user["_id"]},
             {"$set": {"last_login": datetime.utcnow()}}
         )
+        user_cache.invalidate(user["_id"])
 
         # Issue token
         access_token = create_access_token(data={"sub": str(user["_id"])})
 
         # Prepare user payload
-        user_response = format_user_for_frontend(user)
+        user_response = await attach_liked_products(format_user_for_frontend(user))
         user_response["id"] = str(user["_id"])
         user_response["email"] = user.get("email", email)
         user_response["email_verified"] = True
@@ -695,7 +1149,7 @@ async def login(request: Request, credentials: dict):
 @app.get("/api/v1/auth/me")
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     """Get current user information"""
-    return current_user
+    return await attach_liked_products(current_user)
 
 @app.post("/api/v1/auth/logout")
 async def logout():
@@ -741,6 +1195,7 @@ async def verify_user_email_token(verification_token: str):
         if user.get("verification_expires") and user["verification_expires"] < datetime.utcnow():
             # Token has expired, delete the user record to allow re-registration
             await db.users.delete_one({"_id": user["_id"]})
+            user_cache.invalidate(user["_id"])
             raise HTTPException(
                 status_code=410, 
                 detail="Verification token has expired. Please register again with the same email address."
@@ -760,6 +1215,7 @@ async def verify_user_email_token(verification_token: str):
                 }
             }
         )
+        user_cache.invalidate(user["_id"])
         
         # Issue token
         access_token = create_access_token(data={"sub": str(user["_id"])})
@@ -793,17 +1249,18 @@ async def download_newsletter_gift(email: str):
     try:
         print(f"🎁 Newsletter gift download request for: {email}")
         
-        # Generate download URL for the newsletter gift
+        # The gift lives under freebies/: a stable public URL unless the prefix policy says otherwise
         gift_key = "freebies/newsletter-gift/newsletter-Gift.zip"
-        expiration_seconds = 3600  # 1 hour
+        expiration_seconds = 3600  # 1 hour (presigned fallback only)
         download_url = generate_download_url(gift_key, expiration=expiration_seconds)
+        is_public = is_public_r2_key(gift_key)
         
         print(f"✅ Newsletter gift download URL generated for {email}")
         
         return {
             "download_url": download_url,
-            "expires_in": expiration_seconds,
-            "expires_at": (datetime.utcnow() + timedelta(seconds=expiration_seconds)).isoformat() + "Z",
+            "expires_in": None if is_public else expiration_seconds,
+            "expires_at": None if is_public else (datetime.utcnow() + timedelta(seconds=expiration_seconds)).isoformat() + "Z",
             "message": "Newsletter gift download ready!"
         }
         
@@ -916,6 +1373,7 @@ async def verify_user_email(verification_data: dict):
         if user.get("verification_expires") and user["verification_expires"] < datetime.utcnow():
             # Token has expired, delete the user record to allow re-registration
             await db.users.delete_one({"_id": user["_id"]})
+            user_cache.invalidate(user["_id"])
             raise HTTPException(
                 status_code=410, 
                 detail="Verification token has expired. Please register again with the same email address."
@@ -935,6 +1393,7 @@ async def verify_user_email(verification_data: dict):
                 }
             }
         )
+        user_cache.invalidate(user["_id"])
 
         # Issue token
         access_token = create_access_token(data={"sub": str(user["_id"])})
@@ -989,6 +1448,7 @@ async def resend_user_verification(resend_data: dict):
                 }
             }
         )
+        user_cache.invalidate(user["_id"])
 
         try:
             from services.email_service import email_service
@@ -1111,6 +1571,7 @@ async def google_callback(callback_data: dict):
                     }
                 }
             )
+            user_cache.invalidate(existing_user["_id"])
             user = existing_user
         else:
             # Create new user
@@ -1125,8 +1586,7 @@ async def google_callback(callback_data: dict):
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow(),
                 "last_login": datetime.utcnow(),
-                "liked_products": [],
-                "purchased_products": [],
+                "purchased_products_count": 0,
                 "mfa_enabled": False,
                 "bio": None
             }
@@ -1138,7 +1598,7 @@ async def google_callback(callback_data: dict):
         access_token = create_access_token(data={"sub": str(user["_id"])})
         
         # Format user for frontend
-        user_response = format_user_for_frontend(user)
+        user_response = await attach_liked_products(format_user_for_frontend(user))
         user_response.update({
             "status": "active",
             "email_verified": True
@@ -1194,18 +1654,55 @@ async def auto_login(token: str, redirect: str = "/"):
 # Products endpoints
 @app.get("/api/v1/products")
 async def get_products(
+    request: Request = None,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     type: Optional[str] = None,
     featured: Optional[bool] = None,
     bestseller: Optional[bool] = None,
     new: Optional[bool] = None,
-    genre: Optional[str] = None,
-    search: Optional[str] = None
+    genre: Optional[List[str]] = Query(None),
+    search: Optional[str] = None,
+    key: Optional[List[str]] = Query(None),
+    tags: Optional[List[str]] = Query(None),
+    has_stems: Optional[bool] = None,
+    bpm_min: Optional[float] = None,
+    bpm_max: Optional[float] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    facets: bool = False,
+    viewer_id: Optional[str] = Depends(get_optional_user_id)
 ):
-    """Get all products with optional filtering"""
+    """
+    Get all products with optional filtering.
+    genre, key and tags accept several values (repeated or comma-separated);
+    facets=true adds counts per key, genre, tag, stems, bpm and price bucket.
+    With a bearer token each product also carries is_liked / is_purchased.
+    """
     global mongodb_connected
     try:
+        filters = {
+            "type": type,
+            "featured": featured,
+            "bestseller": bestseller,
+            "new": new,
+            "has_stems": has_stems,
+            "genre": split_multi(genre),
+            "key": split_multi(key),
+            "tags": split_multi(tags),
+            "bpm_min": bpm_min,
+            "bpm_max": bpm_max,
+            "price_min": price_min,
+            "price_max": price_max
+        }
+        
+        # Cached listings are stored already JSON-encoded
+        cache_key = ("products", skip, limit, cursor, search, facets, json_util.dumps(filters, sort_keys=True))
+        cached = product_cache.get_query(cache_key)
+        if cached is not None:
+            return await personalized_catalog_response(request, cached, viewer_id)
+        
         # Check if database is connected
         if not mongodb_connected:
             print("❌ Database not connected, returning empty products")
@@ -1214,44 +1711,94 @@ async def get_products(
                 "total": 0,
                 "skip": skip,
                 "limit": limit,
+                "next_cursor": None,
                 "message": "Database temporarily unavailable"
             }
         
         collection = db.products
         
         # Build filter
-        filter_dict = {}
-        if type:
-            filter_dict["type"] = type
-        if featured is not None:
-            filter_dict["featured"] = featured
-        if bestseller is not None:
-            filter_dict["bestseller"] = bestseller
-        if new is not None:
-            filter_dict["new"] = new
-        if genre:
-            filter_dict["genre"] = {"$regex": genre, "$options": "i"}
-        if search:
-            filter_dict["$or"] = [
-                {"title": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-                {"tags": {"$in": [search]}}
-            ]
-        
-        # Get products
-        cursor = collection.find(filter_dict).skip(skip).limit(limit)
-        products = await cursor.to_list(length=limit)
-        
-        # Format for frontend
-        formatted_products = [format_product_for_frontend(product) for product in products]
-        
-        return {
+        filter_dict = build_product_filter(filters)
+        
+        next_cursor = None
+        facet_rows = None
+        if search and search_index.ready:
+            # Rank in memory, then load only the requested page in relevance order
+            # (relevance pages are slices of an in-memory list, so skip stays cheap here)
+            ranked = search_index.search(search, filters=filters)
+            if facets:
+                facet_rows = search_index.facets([product_id for product_id, _ in ranked])
+            page_ids = [ObjectId(product_id) for product_id, _ in ranked[skip:skip + limit]]
+            products_by_id = {}
+            if page_ids:
+                async for product in collection.find({"_id": {"$in": page_ids}}, PRODUCT_PROJECTIONS["card"]):
+                    products_by_id[product["_id"]] = product
+            products = [products_by_id[oid] for oid in page_ids if oid in products_by_id]
+            total = len(ranked)
+        elif bestseller and bestseller_ranking.ready():
+            # Bestsellers come from the sales ranking; the other filters narrow it down
+            ranked_filter = {name: value for name, value in filter_dict.items() if name != "bestseller"}
+            ranked_products = await fetch_ranked_products(bestseller_ranking.top(), ranked_filter)
+            if facets:
+                facet_rows = search_index.facets([str(product["_id"]) for product in ranked_products])
+            products = ranked_products[skip:skip + limit]
+            total = len(ranked_products)
+        else:
+            if search:
+                filter_dict["$or"] = [
+                    {"title": {"$regex": search, "$options": "i"}},
+                    {"description": {"$regex": search, "$options": "i"}},
+                    {"tags": {"$in": [search]}}
+                ]
+            
+            # Real filtered total: estimated count for the whole catalog, otherwise computed
+            # together with the page in one $facet round trip and cached briefly
+            count_key = json_util.dumps(filter_dict, sort_keys=True)
+            total = product_cache.get_count(count_key)
+            if total is None and not filter_dict:
+                total = await collection.estimated_document_count()
+                product_cache.put_count(count_key, total)
+            
+            # Get products (keyset page when a cursor is given, skip otherwise)
+            if total is None:
+                products, next_cursor, total = await paginate_with_total(
+                    collection, filter_dict, skip=skip, limit=limit, cursor=cursor,
+                    projection=PRODUCT_PROJECTIONS["card"]
+                )
+                product_cache.put_count(count_key, total)
+            else:
+                products, next_cursor = await paginate(
+                    collection, filter_dict, skip=skip, limit=limit, cursor=cursor,
+                    projection=PRODUCT_PROJECTIONS["card"]
+                )
+            
+            if facets:
+                facet_key = ("facets", count_key)
+                facet_rows = product_cache.get_query(facet_key)
+                if facet_rows is None:
+                    facet_result = await collection.aggregate([
+                        {"$match": filter_dict},
+                        {"$facet": facet_pipeline()}
+                    ]).to_list(length=1)
+                    facet_rows = facet_result[0] if facet_result else {}
+                    product_cache.put_query(facet_key, facet_rows)
+        
+        # Format for frontend (card view)
+        formatted_products = [format_product_card(product) for product in products]
+        
+        result = {
             "products": formatted_products,
-            "total": len(formatted_products),
+            "total": total,
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
+        if facet_rows is not None:
+            result["facets"] = format_facets(facet_rows)
+        return await personalized_catalog_response(request, cache_catalog_body(cache_key, result, [CATALOG_SURROGATE_KEY]), viewer_id)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting products: {e}")
         print(f"❌ Error type: {type(e)}")
@@ -1260,7 +1807,7 @@ async def get_products(
         raise HTTPException(status_code=500, detail=f"Failed to get products: {str(e)}")
 
 @app.get("/api/v1/products/category-counts")
-async def get_category_counts():
+async def get_category_counts(request: Request = None):
     """Get product counts by category"""
     global mongodb_connected
     try:
@@ -1272,20 +1819,28 @@ async def get_category_counts():
                 "acapellas": 0
             }
         
+        cache_key = ("category-counts",)
+        cached = product_cache.get_query(cache_key)
+        if cached is not None:
+            return catalog_response(request, cached)
+        
         collection = db.products
         
-        # Count products by type - using hyphen version based on URL patterns
-        sample_packs_count = await collection.count_documents({"type": "sample-pack"})
-        midi_packs_count = await collection.count_documents({"type": "midi-pack"})
-        acapellas_count = await collection.count_documents({"type": "acapella"})
+        # Count every product type in one round trip - types use the hyphen version based on URL patterns
+        by_type = {}
+        async for group in collection.aggregate([{"$group": {"_id": "$type", "count": {"$sum": 1}}}]):
+            if group["_id"]:
+                by_type[group["_id"]] = group["count"]
         
-        print(f"📊 Category counts - Sample Packs: {sample_packs_count}, MIDI Packs: {midi_packs_count}, Acapellas: {acapellas_count}")
+        # "sample-pack" -> "sample_packs"; new types get a key the same way
+        counts = {"sample_packs": 0, "midi_packs": 0, "acapellas": 0}
+        for product_type, count in by_type.items():
+            counts[f"{product_type.replace('-', '_')}s"] = count
+        counts["by_type"] = by_type
         
-        return {
-            "sample_packs": sample_packs_count,
-            "midi_packs": midi_packs_count,
-            "acapellas": acapellas_count
-        }
+        print(f"📊 Category counts: {by_type}")
+        
+        return catalog_response(request, cache_catalog_body(cache_key, counts, [CATALOG_SURROGATE_KEY]))
         
     except Exception as e:
         print(f"❌ Error getting category counts: {e}")
@@ -1296,31 +1851,101 @@ async def get_category_counts():
             "acapellas": 0
         }
 
-@app.get("/api/v1/products/{product_slug}")
-async def get_product(product_slug: str):
-    """Get a specific product by slug or ID with proper error handling"""
+@app.post("/api/v1/products/batch")
+async def get_products_batch(batch_data: dict):
+    """Get several products by id or slug in one request, in the order given"""
     try:
-        from utils.errors import validate_object_id, handle_product_not_found
-        from config.logging import secure_logger
+        refs = batch_data.get("ids")
+        if not isinstance(refs, list) or not all(isinstance(ref, str) and ref for ref in refs):
+            raise HTTPException(status_code=400, detail="ids must be a list of product ids or slugs")
+        if len(refs) > MAX_BATCH_PRODUCTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PRODUCTS} products per request")
         
-        collection = db.products
-        product = None
+        if not mongodb_connected:
+            raise HTTPException(status_code=503, detail="Database not available")
         
-        # First try to find by slug
-        product = await collection.find_one({"slug": product_slug})
+        docs = await load_products_batch(refs, PRODUCT_PROJECTIONS["card"])
+        return {
+            "products": [format_product_card(doc) for doc in docs if doc],
+            "missing": [ref for ref, doc in zip(refs, docs) if not doc]
+        }
         
-        # If not found by slug, try by ObjectId (backward compatibility)
-        if not product:
-            try:
-                product_oid = validate_object_id(product_slug)
-                product = await collection.find_one({"_id": product_oid})
-            except:
-                pass
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error getting products batch: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get products")
+
+@app.get("/api/v1/products/bestsellers")
+async def get_bestseller_products(request: Request = None, window: str = BESTSELLER_DEFAULT_WINDOW, limit: int = 10):
+    """Get bestseller products ranked by units sold over a rolling window (7d, 30d or all)"""
+    try:
+        if window not in BESTSELLER_WINDOWS:
+            raise HTTPException(status_code=400, detail=f"Invalid window, expected one of: {', '.join(BESTSELLER_WINDOWS)}")
+        if not bestseller_ranking.ready(window):
+            # No sales ranked in this window: fall back to the hand-maintained flag
+            return await get_products(request=request, bestseller=True, limit=limit, genre=None, key=None, tags=None, viewer_id=None)
+        
+        cache_key = ("bestsellers", window, limit)
+        cached = product_cache.get_query(cache_key)
+        if cached is not None:
+            return catalog_response(request, cached)
+        
+        products = await fetch_ranked_products(bestseller_ranking.top(window, limit), {})
+        result = {
+            "products": [format_product_card(product) for product in products],
+            "total": len(products),
+            "skip": 0,
+            "limit": limit,
+            "next_cursor": None,
+            "window": window
+        }
+        return catalog_response(request, cache_catalog_body(cache_key, result, [CATALOG_SURROGATE_KEY]))
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error getting bestseller products: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get bestseller products")
+
+@app.post("/api/v1/admin/bestsellers/refresh", dependencies=[Depends(require_admin)])
+async def refresh_bestseller_ranking(full: bool = False):
+    """Refresh the bestseller ranking now (full=true rebuilds the daily sales from all orders)"""
+    try:
+        if not mongodb_connected:
+            raise HTTPException(status_code=503, detail="Database not available")
+        changed = await refresh_bestsellers(full=full)
+        return {
+            "success": True,
+            "changed": changed,
+            "rankings": {window: bestseller_ranking.top(window) for window in BESTSELLER_WINDOWS}
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error refreshing bestseller ranking: {e}")
+        raise HTTPException(status_code=500, detail="Failed to refresh bestseller ranking")
+
+@app.get("/api/v1/products/{product_slug}")
+async def get_product(product_slug: str, request: Request = None, viewer_id: Optional[str] = Depends(get_optional_user_id)):
+    """Get a specific product by slug or ID; a bearer token adds is_liked / is_purchased"""
+    try:
+        from utils.errors import handle_product_not_found
+        from config.logging import secure_logger
+        
+        cache_key = ("product", product_slug)
+        cached = product_cache.get_query(cache_key)
+        if cached is not None:
+            product_counters.increment(extract_id_from_slug(product_slug) or slug_index.get(product_slug), "view_count")
+            return await personalized_catalog_response(request, cached, viewer_id)
+        
+        product = await resolve_product(product_slug)
         if not product:
             handle_product_not_found()
+        product_counters.increment(product["id"], "view_count")
         
-        return format_product_for_frontend(product)
+        entry = cache_catalog_body(cache_key, product, [product_surrogate_key(product["id"])])
+        return await personalized_catalog_response(request, entry, viewer_id)
         
     except HTTPException:
         raise
@@ -1329,63 +1954,116 @@ async def get_product(product_slug: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/api/v1/products/{product_slug}/samples")
-async def get_product_samples(product_slug: str):
-    """Get sample files for a product"""
+async def get_product_samples(product_slug: str, request: Request = None, with_previews: bool = False):
+    """
+    Get sample files for a product.
+    with_previews=true also returns every sample's preview_url, signed in one batch,
+    so the page needs no per-sample preview request.
+    """
     try:
-        # Validate ObjectId or find by slug
-        collection = db.products
-        product = None
+        cache_key = ("samples", product_slug)
+        entry = product_cache.get_query(cache_key)
+        if entry is None:
+            product = await resolve_product(product_slug)
+            if not product:
+                raise HTTPException(status_code=404, detail="Product not found")
+            
+            # Get sample files
+            sample_files = product.get("sample_files", [])
+            
+            entry = cache_catalog_body(cache_key, {
+                "success": True,
+                "data": sample_files,
+                "total": len(sample_files)
+            }, [product_surrogate_key(product["id"])])
         
-        # First try to find by slug
-        product = await collection.find_one({"slug": product_slug})
+        if with_previews:
+            return samples_with_previews_response(request, entry)
+        return catalog_response(request, entry)
         
-        # If not found by slug, try by ObjectId (backward compatibility)
-        if not product:
-            try:
-                from utils.errors import validate_object_id
-                product_oid = validate_object_id(product_slug)
-                product = await collection.find_one({"_id": product_oid})
-            except:
-                pass
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error getting product samples: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get product samples")
+
+@app.get("/api/v1/products/{product_slug}/related")
+async def get_related_products(product_slug: str, request: Request = None, limit: int = Query(8, ge=1, le=24)):
+    """
+    "Customers also bought" for a product: co-purchased products from the offline build,
+    or products with similar tags and genre when it has no purchase history
+    """
+    try:
+        from utils.errors import handle_product_not_found
         
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
+        cache_key = ("related", product_slug, limit)
+        cached = product_cache.get_query(cache_key)
+        if cached is not None:
+            return catalog_response(request, cached)
         
-        # Get sample files
-        sample_files = product.get("sample_files", [])
+        # Known slugs and ids are answered from memory; anything else must resolve to a product
+        product_id = slug_index.get(product_slug) or extract_id_from_slug(product_slug)
+        if not product_id or not slug_index.has_product(product_id):
+            product = await resolve_product(product_slug)
+            if not product:
+                handle_product_not_found()
+            product_id = product["id"]
         
-        return {
-            "success": True,
-            "data": sample_files,
-            "total": len(sample_files)
+        related_ids = related_products.get(product_id, limit)
+        source = "co_purchase"
+        if not related_ids:
+            related_ids = search_index.similar(product_id, limit)
+            source = "similar"
+        
+        products = await fetch_ranked_products(related_ids, {})
+        result = {
+            "product_id": product_id,
+            "source": source,
+            "products": [format_product_card(product) for product in products]
         }
+        entry = cache_catalog_body(cache_key, result, [CATALOG_SURROGATE_KEY, product_surrogate_key(product_id)])
+        return catalog_response(request, entry)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error getting product samples: {e}")
-        raise HTTPException(status_code=500, detail="Failed to get product samples")
+        print(f"❌ Error getting related products: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get related products")
+
+SAMPLE_PREVIEW_EXPIRATION = 3600  # 1 hour
+
+def is_public_sample(sample: Dict[str, Any]) -> bool:
+    """Samples flagged public (or under a public prefix) get a stable public URL"""
+    return bool(sample.get("public")) or is_public_r2_key(sample["r2_key"])
+
+def samples_with_previews_response(request: Optional[Request], entry: tuple) -> Response:
+    """
+    Cached samples body with preview_url / expires_in added to every sample.
+    The URLs come from the presigned URL cache and outlive any catalog cache.
+    If signing fails the samples are returned without previews; the
+    per-sample preview endpoint still works as a fallback.
+    """
+    content = decode_json(entry[0])
+    samples = [sample for sample in content["data"] if sample.get("r2_key")]
+    public = [is_public_sample(sample) for sample in samples]
+    try:
+        preview_urls = generate_download_urls(
+            [sample["r2_key"] for sample in samples], expiration=SAMPLE_PREVIEW_EXPIRATION, public=public
+        )
+    except HTTPException as e:
+        print(f"⚠️ Could not sign sample previews, returning samples without them: {e.detail}")
+        return catalog_response(request, entry)
+    for sample, preview_url, is_public in zip(samples, preview_urls, public):
+        sample["preview_url"] = preview_url
+        sample["expires_in"] = None if is_public else SAMPLE_PREVIEW_EXPIRATION
+    body = encode_json(content)
+    return catalog_response(request, (body, make_etag(body), entry[2]))
 
 @app.get("/api/v1/samples/{sample_id}/preview")
 async def get_sample_preview(sample_id: str, product_slug: str):
     """Get presigned URL for sample preview"""
     try:
-        # Validate ObjectId or find by slug
-        collection = db.products
-        product = None
-        
-        # First try to find by slug
-        product = await collection.find_one({"slug": product_slug})
-        
-        # If not found by slug, try by ObjectId (backward compatibility)
-        if not product:
-            try:
-                from utils.errors import validate_object_id
-                product_oid = validate_object_id(product_slug)
-                product = await collection.find_one({"_id": product_oid})
-            except:
-                pass
-        
+        product = await resolve_product(product_slug)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         
@@ -1401,8 +2079,9 @@ async def get_sample_preview(sample_id: str, product_slug: str):
         if not r2_key:
             raise HTTPException(status_code=404, detail="Sample file not found")
         
-        # Generate presigned URL (1 hour expiry for previews)
-        preview_url = generate_download_url(r2_key, expiration=3600)
+        # Samples flagged public get a stable public URL, others are presigned (1 hour expiry for previews)
+        is_public = is_public_sample(sample)
+        preview_url = generate_download_url(r2_key, expiration=SAMPLE_PREVIEW_EXPIRATION, public=is_public)
         
         return {
             "success": True,
@@ -1411,7 +2090,7 @@ async def get_sample_preview(sample_id: str, product_slug: str):
                 "title": sample.get("title"),
                 "duration": sample.get("duration"),
                 "preview_url": preview_url,
-                "expires_in": 3600
+                "expires_in": None if is_public else SAMPLE_PREVIEW_EXPIRATION
             }
         }
         
@@ -1421,25 +2100,19 @@ async def get_sample_preview(sample_id: str, product_slug: str):
         print(f"❌ Error getting sample preview: {e}")
         raise HTTPException(status_code=500, detail="Failed to get sample preview")
 
-@app.get("/api/v1/products/bestsellers")
-async def get_bestseller_products():
-    """Get bestseller products"""
-    return await get_products(bestseller=True, limit=10)
-
 @app.get("/api/v1/products/new")
 async def get_new_products():
     """Get new products"""
-    return await get_products(new=True, limit=10)
+    return await get_products(new=True, limit=10, genre=None, key=None, tags=None, viewer_id=None)
 
 
 # Users endpoints
 @app.get("/api/v1/users")
-async def get_users(skip: int = 0, limit: int = 20):
+async def get_users(skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """Get all users (admin only)"""
     try:
         collection = db.users
-        cursor = collection.find({}).skip(skip).limit(limit)
-        users = await cursor.to_list(length=limit)
+        users, next_cursor = await paginate(collection, {}, skip=skip, limit=limit, cursor=cursor)
         
         formatted_users = [format_user_for_frontend(user) for user in users]
         
@@ -1447,9 +2120,12 @@ async def get_users(skip: int = 0, limit: int = 20):
             "users": formatted_users,
             "total": len(formatted_users),
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting users: {e}")
         raise HTTPException(status_code=500, detail="Failed to get users")
@@ -1474,12 +2150,11 @@ async def get_user(user_id: str):
 
 # Orders endpoints
 @app.get("/api/v1/orders")
-async def get_orders(skip: int = 0, limit: int = 20):
+async def get_orders(skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """Get all orders (admin only)"""
     try:
         collection = db.orders
-        cursor = collection.find({}).skip(skip).limit(limit)
-        orders = await cursor.to_list(length=limit)
+        orders, next_cursor = await paginate(collection, {}, skip=skip, limit=limit, cursor=cursor)
         
         formatted_orders = [format_order_for_frontend(order) for order in orders]
         
@@ -1487,9 +2162,12 @@ async def get_orders(skip: int = 0, limit: int = 20):
             "orders": formatted_orders,
             "total": len(formatted_orders),
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting orders: {e}")
         raise HTTPException(status_code=500, detail="Failed to get orders")
@@ -1513,78 +2191,91 @@ async def get_order(order_id: str):
         raise HTTPException(status_code=500, detail="Failed to get order")
 
 # New collections endpoints
-@app.get("/api/v1/entitlements")
-async def get_entitlements(skip: int = 0, limit: int = 20):
-    """Get all entitlements"""
+@app.get("/api/v1/entitlements", dependencies=[Depends(require_admin)])
+async def get_entitlements(skip: int = 0, limit: int = 20, cursor: Optional[str] = None, user_id: Optional[str] = None):
+    """Get all entitlements (product ownership), optionally for one user"""
     try:
         collection = db.entitlements
-        cursor = collection.find({}).skip(skip).limit(limit)
-        entitlements = await cursor.to_list(length=limit)
+        filter_dict = {}
+        if user_id:
+            if not ObjectId.is_valid(user_id):
+                raise HTTPException(status_code=400, detail="Invalid user ID format")
+            filter_dict["user_id"] = ObjectId(user_id)
+        entitlements, next_cursor = await paginate(collection, filter_dict, skip=skip, limit=limit, cursor=cursor)
         
         return {
-            "entitlements": entitlements,
+            "entitlements": [format_entitlement_for_frontend(entitlement) for entitlement in entitlements],
             "total": len(entitlements),
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting entitlements: {e}")
         raise HTTPException(status_code=500, detail="Failed to get entitlements")
 
 @app.get("/api/v1/download-tokens")
-async def get_download_tokens(skip: int = 0, limit: int = 20):
+async def get_download_tokens(skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """Get all download tokens"""
     try:
         collection = db.download_tokens
-        cursor = collection.find({}).skip(skip).limit(limit)
-        tokens = await cursor.to_list(length=limit)
+        tokens, next_cursor = await paginate(collection, {}, skip=skip, limit=limit, cursor=cursor)
         
         return {
             "tokens": tokens,
             "total": len(tokens),
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting download tokens: {e}")
         raise HTTPException(status_code=500, detail="Failed to get download tokens")
 
 @app.get("/api/v1/download-logs")
-async def get_download_logs(skip: int = 0, limit: int = 20):
+async def get_download_logs(skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """Get all download logs"""
     try:
         collection = db.download_logs
-        cursor = collection.find({}).skip(skip).limit(limit)
-        logs = await cursor.to_list(length=limit)
+        logs, next_cursor = await paginate(collection, {}, skip=skip, limit=limit, cursor=cursor)
         
         return {
             "logs": logs,
             "total": len(logs),
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting download logs: {e}")
         raise HTTPException(status_code=500, detail="Failed to get download logs")
 
 @app.get("/api/v1/sessions")
-async def get_sessions(skip: int = 0, limit: int = 20):
+async def get_sessions(skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """Get all sessions"""
     try:
         collection = db.sessions
-        cursor = collection.find({}).skip(skip).limit(limit)
-        sessions = await cursor.to_list(length=limit)
+        sessions, next_cursor = await paginate(collection, {}, skip=skip, limit=limit, cursor=cursor)
         
         return {
             "sessions": sessions,
             "total": len(sessions),
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting sessions: {e}")
         raise HTTPException(status_code=500, detail="Failed to get sessions")
@@ -1622,40 +2313,53 @@ def _normalize_r2_key(raw_key: str) -> str:
     return key
 
 
-def _expires_info(seconds: int):
-    now = datetime.utcnow()
-    return {
-        "now": now.isoformat() + "Z",
-        "expires_in": seconds,
-        "expires_at": (now + timedelta(seconds=seconds)).isoformat() + "Z",
-    }
+def is_public_r2_key(object_key: str) -> bool:
+    """True if the public-prefix policy serves this object without a signature."""
+    return bool(R2_PUBLIC_URL) and _normalize_r2_key(object_key).startswith(R2_PUBLIC_PREFIXES)
 
 
-def generate_download_url(object_key: str, expiration: int = 3600) -> str:
-    """Generate a presigned URL for R2 download (path-style, s3v4)."""
-    if not r2_client:
-        raise HTTPException(status_code=500, detail="R2 not configured")
+def public_r2_url(object_key: str) -> str:
+    """Stable, CDN-cacheable URL of an object on the public bucket domain."""
+    return f"{R2_PUBLIC_URL.rstrip('/')}/{quote(_normalize_r2_key(object_key), safe='/~')}"
+
+
+def generate_download_url(object_key: str, expiration: int = 3600, public: bool = False) -> str:
+    """
+    Download URL for an R2 object: a public URL for free/public assets (see
+    generate_download_urls), otherwise presigned (path-style, s3v4) for at
+    least `expiration` seconds.
+    """
+    return generate_download_urls([object_key], expiration, [public])[0]
+
 
-    key = _normalize_r2_key(object_key)
+def generate_download_urls(object_keys: List[str], expiration: int = 3600,
+                           public: Optional[List[bool]] = None) -> List[str]:
+    """
+    Download URLs for several R2 objects, in input order. Objects flagged in
+    `public` (free products, public samples) or under R2_PUBLIC_PREFIXES get
+    public URLs; the rest are presigned in one batch.
+    """
+    public = public or [False] * len(object_keys)
+    urls: List[Optional[str]] = [
+        public_r2_url(object_key) if R2_PUBLIC_URL and (is_public or is_public_r2_key(object_key)) else None
+        for object_key, is_public in zip(object_keys, public)
+    ]
+    private = [index for index, url in enumerate(urls) if url is None]
+    if not private:
+        return urls
+    if not r2_presigner:
+        raise HTTPException(status_code=500, detail="R2 not configured")
 
-    info = _expires_info(expiration)
-    print(
-        f"🔐 Presign R2 URL | bucket={R2_BUCKET_NAME} key='{key}' "
-        f"now={info['now']} expires_in={info['expires_in']}s expires_at={info['expires_at']}"
-    )
+    keys = [_normalize_r2_key(object_keys[index]) for index in private]
 
     try:
-        url = r2_client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": R2_BUCKET_NAME, "Key": key},
-            ExpiresIn=expiration,
-        )
-        return url
-    except ClientError as e:
-        code = getattr(e, "response", {}).get("Error", {}).get("Code")
-        msg = getattr(e, "response", {}).get("Error", {}).get("Message")
-        print(f"❌ Error generating download URL: code={code} msg={msg} key='{key}'")
+        signed = presigned_url_cache.get_many(keys, expiration, r2_presigner.presign_many)
+    except Exception as e:
+        print(f"❌ Error generating download URLs: {e} keys={keys}")
         raise HTTPException(status_code=500, detail="Failed to generate download URL")
+    for index, url in zip(private, signed):
+        urls[index] = url
+    return urls
 
 # ---------- END R2 HELPERS ----------
 
@@ -1705,19 +2409,56 @@ async def find_user_order_for_product(user_id: str, product_id: str) -> dict:
             "can_download": False
         }
 
+async def get_entitlement_summary(user_id: str) -> Dict[str, dict]:
+    """
+    Download state per purchased product for a user, computed server-side in one $group
+    (the response size depends on the number of products, not on the number of orders)
+    """
+    pipeline = [
+        {"$match": {"user_id": ObjectId(user_id), "status": "completed"}},
+        # Orders of signed-in users without a download counter are unlimited, like -1
+        {"$project": {
+            "product_id": "$items.product_id",
+            "downloads_remaining": {"$ifNull": ["$downloads_remaining", -1]},
+            "created_at": 1
+        }},
+        {"$unwind": "$product_id"},
+        {"$group": {
+            "_id": "$product_id",
+            "orders": {"$sum": 1},
+            "unlimited": {"$max": {"$eq": ["$downloads_remaining", -1]}},
+            "downloads_remaining": {"$sum": {"$max": ["$downloads_remaining", 0]}},
+            "last_order_at": {"$max": "$created_at"}
+        }}
+    ]
+    summary = {}
+    async for row in db.orders.aggregate(pipeline):
+        downloads_remaining = -1 if row["unlimited"] else row["downloads_remaining"]
+        summary[str(row["_id"])] = {
+            "orders": row["orders"],
+            "downloads_remaining": downloads_remaining,
+            "can_download": downloads_remaining != 0,
+            "last_order_at": row.get("last_order_at")
+        }
+    return summary
+
 async def check_user_downloads(user_id: str) -> dict:
     """Check user's download count and remaining downloads (legacy function for compatibility)"""
     try:
         user_object_id = ObjectId(user_id)
         
-        # Get all completed orders for this user
-        orders = await db.orders.find({
-            "user_id": user_object_id,
-            "status": "completed"
-        }).to_list(length=None)
+        # Sum the counters server-side instead of loading every completed order
+        totals = await db.orders.aggregate([
+            {"$match": {"user_id": user_object_id, "status": "completed"}},
+            {"$group": {
+                "_id": None,
+                "downloads_remaining": {"$sum": {"$ifNull": ["$downloads_remaining", 0]}},
+                "orders": {"$sum": 1}
+            }}
+        ]).to_list(length=1)
         
-        total_downloads_remaining = sum(order.get("downloads_remaining", 0) for order in orders)
-        total_orders = len(orders)
+        total_downloads_remaining = totals[0]["downloads_remaining"] if totals else 0
+        total_orders = totals[0]["orders"] if totals else 0
         
         return {
             "total_downloads": 0,  # Legacy field
@@ -1742,14 +2483,7 @@ async def get_download_url(product_id: str, current_user: dict = Depends(get_cur
         user_id = current_user["id"]
         
         # Check if user has purchased this product
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        purchased_products = user.get("purchased_products", [])
-        print(f"📦 User's purchased products: {purchased_products}")
-        
-        if ObjectId(product_id) not in purchased_products:
+        if not await owns_product(db, user_id, product_id):
             raise HTTPException(status_code=403, detail="Product not purchased")
         
         # For signed-in users, we allow unlimited downloads
@@ -1771,7 +2505,7 @@ async def get_download_url(product_id: str, current_user: dict = Depends(get_cur
         print(f"🔗 Normalized key: '{object_key}'")
         
         expiration_seconds = 3600
-        download_url = generate_download_url(object_key, expiration=expiration_seconds)
+        download_url = generate_download_url(object_key, expiration=expiration_seconds, public=product.get("is_free", False))
         print(f"✅ Download URL generated: {download_url}")
         
         # Log download event (no counter decrement for signed-in users)
@@ -1831,10 +2565,10 @@ async def get_download_history(current_user: dict = Depends(get_current_user)):
         cursor = db.download_events.find({"user_id": ObjectId(user_id)}).sort("created_at", -1)
         events = await cursor.to_list(length=50)  # Last 50 downloads
         
-        # Get product details for each download
+        # Get product titles for all downloads in one query
+        products = await load_products_batch([event["product_id"] for event in events], {"title": 1})
         download_history = []
-        for event in events:
-            product = await db.products.find_one({"_id": event["product_id"]})
+        for event, product in zip(events, products):
             if product:
                 download_history.append({
                     "id": str(event["_id"]),
@@ -1862,28 +2596,12 @@ async def get_liked_products(current_user: dict = Depends(get_current_user)):
     try:
         user_id = current_user["id"]
         
-        # Get user's liked products
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        liked_product_ids = user.get("liked_products", [])
+        # Get user's liked products (most recent first)
+        liked_ids = await load_liked_product_ids(user_id)
         
-        # Get product details for liked products
-        liked_products = []
-        for product_id in liked_product_ids:
-            product = await db.products.find_one({"_id": product_id})
-            if product:
-                liked_products.append({
-                    "id": str(product["_id"]),
-                    "title": product.get("title", "Unknown Product"),
-                    "artist": product.get("artist", "Unknown Artist"),
-                    "price": product.get("price", 0),
-                    "description": product.get("description", ""),
-                    "cover_image_url": product.get("cover_image_url", "/images/placeholder-product.jpg"),
-                    "type": product.get("type", "sample-pack"),
-                    "created_at": product.get("created_at", datetime.utcnow()).isoformat()
-                })
+        # Get product details for liked products in one query
+        products = await load_products_batch(liked_ids, PRODUCT_PROJECTIONS["profile"])
+        liked_products = [format_profile_product(product) for product in products if product]
         
         return {
             "products": liked_products,
@@ -1902,32 +2620,24 @@ async def get_purchased_products(current_user: dict = Depends(get_current_user))
     try:
         user_id = current_user["id"]
         
-        # Get user's purchased products
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        # Get user's purchased products (oldest purchase first)
+        purchased_product_ids = await owned_product_ids(db, user_id)
+        
+        # Get product details for purchased products in one query
+        products = await load_products_batch(purchased_product_ids, PRODUCT_PROJECTIONS["profile"])
         
-        purchased_product_ids = user.get("purchased_products", [])
+        # Download state per product from one $group over the user's orders
+        entitlements = await get_entitlement_summary(user_id) if any(products) else {}
         
-        # Get product details for purchased products
         purchased_products = []
-        for product_id in purchased_product_ids:
-            product = await db.products.find_one({"_id": product_id})
+        for product in products:
             if product:
-                # Get download info for this product
-                download_info = await check_user_downloads(user_id)
-                
+                # Purchases without an order record (e.g. granted manually) download like any signed-in purchase
+                entitlement = entitlements.get(str(product["_id"]), {"downloads_remaining": -1, "can_download": True})
                 purchased_products.append({
-                    "id": str(product["_id"]),
-                    "title": product.get("title", "Unknown Product"),
-                    "artist": product.get("artist", "Unknown Artist"),
-                    "price": product.get("price", 0),
-                    "description": product.get("description", ""),
-                    "cover_image_url": product.get("cover_image_url", "/images/placeholder-product.jpg"),
-                    "type": product.get("type", "sample-pack"),
-                    "created_at": product.get("created_at", datetime.utcnow()).isoformat(),
-                    "can_download": download_info["can_download"],
-                    "downloads_remaining": download_info["downloads_remaining"]
+                    **format_profile_product(product),
+                    "can_download": entitlement["can_download"],
+                    "downloads_remaining": entitlement["downloads_remaining"]
                 })
         
         return {
@@ -1953,13 +2663,8 @@ async def check_product_purchased(product_id: str, current_user: dict = Depends(
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid product ID format")
         
-        # Check if user exists and has purchased this product
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        purchased_products = user.get("purchased_products", [])
-        has_purchased = product_oid in purchased_products
+        # Indexed ownership lookup
+        has_purchased = await owns_product(db, user_id, product_oid)
         
         print(f"🔍 User {user_id} purchase check for product {product_id}: {has_purchased}")
         
@@ -1974,6 +2679,30 @@ async def check_product_purchased(product_id: str, current_user: dict = Depends(
         print(f"❌ Error checking purchased product: {e}")
         raise HTTPException(status_code=500, detail="Failed to check purchased product")
 
+@app.post("/api/v1/profile/ownership")
+async def get_product_ownership(ownership_data: dict, current_user: dict = Depends(get_current_user)):
+    """Purchased and liked flags for a list of products (e.g. every card of a grid) in one request"""
+    try:
+        product_ids = ownership_data.get("product_ids")
+        if not isinstance(product_ids, list) or not all(isinstance(product_id, str) for product_id in product_ids):
+            raise HTTPException(status_code=400, detail="product_ids must be a list of product IDs")
+        if len(product_ids) > MAX_BATCH_PRODUCTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PRODUCTS} products per request")
+        
+        purchased, liked = await load_product_sets(current_user["id"])
+        return {
+            "ownership": {
+                product_id: {"purchased": product_id in purchased, "liked": product_id in liked}
+                for product_id in product_ids
+            }
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error checking product ownership: {e}")
+        raise HTTPException(status_code=500, detail="Failed to check product ownership")
+
 @app.post("/api/v1/profile/toggle-like")
 async def toggle_like_product(product_data: dict, current_user: dict = Depends(get_current_user)):
     """Toggle like status for a product"""
@@ -1990,35 +2719,27 @@ async def toggle_like_product(product_data: dict, current_user: dict = Depends(g
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid product ID format")
         
-        # Check if product exists
-        product = await db.products.find_one({"_id": product_oid})
-        if not product:
+        # Check if product exists (known catalog ids are answered from memory)
+        if not slug_index.has_product(product_id) and not await db.products.find_one({"_id": product_oid}, {"_id": 1}):
             raise HTTPException(status_code=404, detail="Product not found")
         
-        # Get current user to check if product is already liked
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
+        # Move a not yet migrated legacy array first (the user is already loaded by the auth dependency)
+        user = await load_user(user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        liked_products = user.get("liked_products", [])
-        is_liked = product_oid in liked_products
-        
-        if is_liked:
-            # Remove from liked products
-            await db.users.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$pull": {"liked_products": product_oid}}
-            )
-            liked = False
-            message = "Product unliked successfully"
-        else:
-            # Add to liked products
-            await db.users.update_one(
-                {"_id": ObjectId(user_id)},
-                {"$addToSet": {"liked_products": product_oid}}
-            )
-            liked = True
+        if has_legacy_likes(user):
+            await migrate_user_likes(db, user)
+            user_cache.invalidate(user_id)
+        
+        # One atomic round trip; like_count goes through the write-behind counter buffer
+        liked = await toggle_like(db, user_id, product_oid)
+        ownership_cache.invalidate(user_id)
+        if liked:
             message = "Product liked successfully"
+            product_counters.increment(product_id, "like_count")
+        else:
+            message = "Product unliked successfully"
+            product_counters.increment(product_id, "like_count", -1)
         
         return {
             "message": message,
@@ -2054,12 +2775,6 @@ async def purchase_product(order_data: dict, current_user: dict = Depends(get_cu
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Add to purchased products
-        await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$addToSet": {"purchased_products": product_oid}}
-        )
-
         # Calculate totals (no tax)
         subtotal = product.get("price", 0)
         tax_rate = 0  # No tax
@@ -2087,11 +2802,16 @@ async def purchase_product(order_data: dict, current_user: dict = Depends(get_cu
             "is_fulfilled": True,
             "fulfillment_date": datetime.utcnow(),
         }
-        await db.orders.insert_one(order)
+        result = await db.orders.insert_one(order)
+        record_purchases(order["items"])
+
+        # Grant ownership of the product
+        await grant_entitlements(db, user_id, [product_oid], source="purchase", order_id=result.inserted_id)
+        invalidate_user_products(user_id)
 
-        # Generate a presigned download url (1h)
+        # Generate a download url (presigned for 1h unless the product is free)
         file_path = product.get("file_path", f"products/{product_id}.zip")
-        download_url = generate_download_url(file_path, expiration=3600)
+        download_url = generate_download_url(file_path, expiration=3600, public=product.get("is_free", False))
 
         # Log download event (first download right away is optional)
         await db.download_events.insert_one({
@@ -2109,7 +2829,7 @@ async def purchase_product(order_data: dict, current_user: dict = Depends(get_cu
             print(f"📧 Sending user thank you email to {current_user['email']}")
             
             # Get user details
-            user = await db.users.find_one({"_id": ObjectId(user_id)})
+            user = await load_user(user_id)
             user_name = user.get("name", "User") if user else "User"
             
             # Create download link object
@@ -2170,14 +2890,14 @@ async def create_user_order(order_data: dict, current_user: dict = Depends(get_c
         product_ids = []
         
         for item in items:
-            try:
-                product_oid = ObjectId(item["product_id"])
-            except Exception:
+            if not ObjectId.is_valid(item["product_id"]):
                 raise HTTPException(status_code=400, detail=f"Invalid product ID: {item['product_id']}")
-            
-            product = await db.products.find_one({"_id": product_oid})
+        
+        products = await load_products_batch([item["product_id"] for item in items])
+        for item, product in zip(items, products):
             if not product:
                 raise HTTPException(status_code=404, detail=f"Product not found: {item['product_id']}")
+            product_oid = product["_id"]
             
             quantity = item.get("quantity", 1)
             price = product.get("price", 0)
@@ -2199,12 +2919,6 @@ async def create_user_order(order_data: dict, current_user: dict = Depends(get_c
         tax_amount = 0
         total_amount = subtotal
         
-        # Add all products to user's purchased products
-        await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$addToSet": {"purchased_products": {"$each": product_ids}}}
-        )
-        
         # Generate order number
         order_number = f"USER-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
         
@@ -2230,10 +2944,15 @@ async def create_user_order(order_data: dict, current_user: dict = Depends(get_c
         }
         
         result = await db.orders.insert_one(order)
+        record_purchases(validated_items)
+        
+        # Grant ownership of all ordered products
+        await grant_entitlements(db, user_id, product_ids, source="order", order_id=result.inserted_id)
+        invalidate_user_products(user_id)
         
         # Update coupon usage status to completed
         try:
-            user = await db.users.find_one({"_id": ObjectId(user_id)})
+            user = await load_user(user_id)
             user_email = user.get("email", "") if user else ""
             await update_coupon_usage_status(
                 user_email=user_email,
@@ -2247,23 +2966,22 @@ async def create_user_order(order_data: dict, current_user: dict = Depends(get_c
         try:
             from services.email_service import email_service
             
-            # Generate download links
+            # Generate download links (one signing batch for the whole order)
             download_links = []
-            for item in validated_items:
-                product = await db.products.find_one({"_id": item["product_id"]})
-                if product:
-                    raw_key = product.get("file_path", f"products/{item['product_id']}.zip")
-                    object_key = _normalize_r2_key(raw_key)
-                    expiration_seconds = 3600  # 1 hour
-                    download_url = generate_download_url(object_key, expiration=expiration_seconds)
-                    
-                    download_links.append({
-                        "title": item["title"],
-                        "artist": product.get("artist", "Unknown Artist"),
-                        "download_url": download_url
-                    })
+            purchased = [(item, product) for item, product in zip(validated_items, products) if product]
+            download_urls = generate_download_urls(
+                [product.get("file_path", f"products/{item['product_id']}.zip") for item, product in purchased],
+                expiration=3600,  # 1 hour
+                public=[product.get("is_free", False) for _, product in purchased]
+            )
+            for (item, product), download_url in zip(purchased, download_urls):
+                download_links.append({
+                    "title": item["title"],
+                    "artist": product.get("artist", "Unknown Artist"),
+                    "download_url": download_url
+                })
             
-            user = await db.users.find_one({"_id": ObjectId(user_id)})
+            user = await load_user(user_id)
             customer_name = customer.get("firstName", "") + " " + customer.get("lastName", "")
             if not customer_name.strip():
                 customer_name = user.get("name", "Valued Customer")
@@ -2327,9 +3045,12 @@ async def guest_checkout(checkout_data: dict):
             # Validate ObjectId format
             if not ObjectId.is_valid(product_id):
                 raise HTTPException(status_code=400, detail=f"Invalid product ID format: {product_id}")
+        
+        products = await load_products_batch([item["product_id"] for item in items])
+        for item, product in zip(items, products):
+            product_id = item["product_id"]
             
             # Check if product exists
-            product = await db.products.find_one({"_id": ObjectId(product_id)})
             if not product:
                 raise HTTPException(status_code=404, detail=f"Product not found: {product_id}")
             
@@ -2568,15 +3289,16 @@ async def verify_guest_order(verification_data: dict):
                 }
             }
         )
+        record_purchases(order["items"])
         
         # Generate one-time download links for immediate download (short window)
+        products = await load_products_batch([item["product_id"] for item in order["items"]])
         immediate_download_links = []
-        for item in order["items"]:
-            product = await db.products.find_one({"_id": ObjectId(item["product_id"])})
+        for item, product in zip(order["items"], products):
             if product:
                 raw_key = product.get("file_path", f"products/{item['product_id']}.zip")
                 object_key = _normalize_r2_key(raw_key)
-                download_url = generate_download_url(object_key, expiration=900)  # 15 minutes
+                download_url = generate_download_url(object_key, expiration=900, public=product.get("is_free", False))  # 15 minutes
                 immediate_download_links.append({
                     "product_title": product.get("title", "Unknown Product"),
                     "download_url": download_url,
@@ -2586,14 +3308,13 @@ async def verify_guest_order(verification_data: dict):
         
         # Prepare email download links (longer window)
         email_download_links = []
-        for item in order["items"]:
-            product = await db.products.find_one({"_id": ObjectId(item["product_id"])})
+        for item, product in zip(order["items"], products):
             if product:
                 raw_key = product.get("file_path", f"products/{item['product_id']}.zip")
                 print(f"📁 Email - Raw file path from DB: '{raw_key}'")
                 object_key = _normalize_r2_key(raw_key)
                 print(f"🔗 Email - Normalized key: '{object_key}'")
-                download_url = generate_download_url(object_key, expiration=86400)  # 24 hours
+                download_url = generate_download_url(object_key, expiration=86400, public=product.get("is_free", False))  # 24 hours
                 print(f"✅ Email - Download URL generated: {download_url}")
                 email_download_links.append({
                     "product_title": product.get("title", "Unknown Product"),
@@ -2648,7 +3369,7 @@ async def get_guest_download(order_id: str, verification_token: str):
         raw_key = product.get("file_path", f"products/{product_id}.zip")
         object_key = _normalize_r2_key(raw_key)
         expiration_seconds = 3600
-        download_url = generate_download_url(object_key, expiration=expiration_seconds)
+        download_url = generate_download_url(object_key, expiration=expiration_seconds, public=product.get("is_free", False))
         
         # Update download count
         await db.guest_orders.update_one(
@@ -2705,6 +3426,7 @@ async def complete_guest_order(order_data: dict):
                 }
             }
         )
+        record_purchases(order.get("items", []))
         
         # Update coupon usage status to completed
         try:
@@ -2719,23 +3441,24 @@ async def complete_guest_order(order_data: dict):
         try:
             from services.email_service import email_service
             
-            # Generate download links
+            # Generate download links (one signing batch for the whole order)
             download_links = []
-            for item in order.get("items", []):
-                product = await db.products.find_one({"_id": ObjectId(item["product_id"])})
-                if product:
-                    raw_key = product.get("file_path", f"products/{item['product_id']}.zip")
-                    object_key = _normalize_r2_key(raw_key)
-                    expiration_seconds = 3600  # 1 hour
-                    download_url = generate_download_url(object_key, expiration=expiration_seconds)
-                    
-                    download_links.append({
-                        "title": item["title"],
-                        "artist": item.get("made_by", product.get("made_by", "Unknown Artist")),
-                        "price": f"${item['price']:.2f}",
-                        "cover_image_url": item.get("cover_image_url", product.get("cover_image_url", "/images/placeholder-product.jpg")),
-                        "download_url": download_url
-                    })
+            order_items = order.get("items", [])
+            products = await load_products_batch([item["product_id"] for item in order_items])
+            purchased = [(item, product) for item, product in zip(order_items, products) if product]
+            download_urls = generate_download_urls(
+                [product.get("file_path", f"products/{item['product_id']}.zip") for item, product in purchased],
+                expiration=3600,  # 1 hour
+                public=[product.get("is_free", False) for _, product in purchased]
+            )
+            for (item, product), download_url in zip(purchased, download_urls):
+                download_links.append({
+                    "title": item["title"],
+                    "artist": item.get("made_by", product.get("made_by", "Unknown Artist")),
+                    "price": f"${item['price']:.2f}",
+                    "cover_image_url": item.get("cover_image_url", product.get("cover_image_url", "/images/placeholder-product.jpg")),
+                    "download_url": download_url
+                })
             
             email_sent = email_service.send_guest_thank_you_email(
                 email=order["guest_email"],
@@ -2790,24 +3513,25 @@ async def get_guest_download_links(order_number: str):
         
         download_links = []
         
-        for item in order["items"]:
-            product = await db.products.find_one({"_id": ObjectId(item["product_id"])})
-            if product:
-                raw_key = product.get("file_path", f"products/{item['product_id']}.zip")
-                object_key = _normalize_r2_key(raw_key)
-                expiration_seconds = 3600  # 1 hour
-                download_url = generate_download_url(object_key, expiration=expiration_seconds)
-                
-                download_links.append({
-                    "product_id": item["product_id"],
-                    "title": item["title"],
-                    "artist": product.get("artist", "Unknown Artist"),
-                    "price": f"${item['price']:.2f}",
-                    "download_url": download_url,
-                    "cover_image_url": product.get("cover_image_url", "/images/placeholder-product.jpg"),
-                    "expires_in": expiration_seconds,
-                    "expires_at": (datetime.utcnow() + timedelta(seconds=expiration_seconds)).isoformat() + "Z"
-                })
+        products = await load_products_batch([item["product_id"] for item in order["items"]])
+        purchased = [(item, product) for item, product in zip(order["items"], products) if product]
+        expiration_seconds = 3600  # 1 hour
+        download_urls = generate_download_urls(
+            [product.get("file_path", f"products/{item['product_id']}.zip") for item, product in purchased],
+            expiration=expiration_seconds,
+            public=[product.get("is_free", False) for _, product in purchased]
+        )
+        for (item, product), download_url in zip(purchased, download_urls):
+            download_links.append({
+                "product_id": item["product_id"],
+                "title": item["title"],
+                "artist": product.get("artist", "Unknown Artist"),
+                "price": f"${item['price']:.2f}",
+                "download_url": download_url,
+                "cover_image_url": product.get("cover_image_url", "/images/placeholder-product.jpg"),
+                "expires_in": expiration_seconds,
+                "expires_at": (datetime.utcnow() + timedelta(seconds=expiration_seconds)).isoformat() + "Z"
+            })
         
         return {
             "order_number": order["order_number"],
@@ -2874,6 +3598,7 @@ async def update_user_profile(request: Request, profile_data: dict, current_user
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+        user_cache.invalidate(user_id)
         
         if result.modified_count == 0:
             secure_logger.warning("No changes made to user profile", {"user_id": user_id})
@@ -2881,13 +3606,13 @@ async def update_user_profile(request: Request, profile_data: dict, current_user
             secure_logger.info("Profile updated successfully", {"user_id": user_id})
         
         # Get updated user data
-        updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
+        updated_user = await load_user(user_id)
         if not updated_user:
             raise HTTPException(status_code=404, detail="User not found after update")
         
         return {
             "message": "Profile updated successfully",
-            "user": format_user_for_frontend(updated_user)
+            "user": await attach_liked_products(format_user_for_frontend(updated_user))
         }
         
     except HTTPException:
@@ -2937,8 +3662,13 @@ async def transfer_guest_orders(current_user: dict = Depends(get_current_user)):
                     "transferred_from_guest": True
                 }
                 
-                # Insert user order
-                await db.orders.insert_one(user_order)
+                # Insert user order and grant ownership of its products
+                result = await db.orders.insert_one(user_order)
+                await grant_entitlements(
+                    db, user_id, [item["product_id"] for item in guest_order["items"]],
+                    source="guest_transfer", order_id=result.inserted_id
+                )
+                invalidate_user_products(user_id)
                 transferred_count += 1
                 
                 print(f"✅ Transferred guest order: {guest_order['order_number']}")
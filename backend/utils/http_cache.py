@@ -0,0 +1,76 @@
+"""
+HTTP caching helpers for the public catalog endpoints.
+
+Catalog responses carry a strong ETag (hash of the encoded body), a
+Last-Modified for the catalog, Cache-Control for browsers and the CDN, and
+surrogate keys so a product update can purge only the affected CDN entries.
+"""
+import hashlib
+import os
+from email.utils import formatdate
+from typing import Dict, List, Optional
+
+import httpx
+
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+CATALOG_STALE_WHILE_REVALIDATE = int(os.getenv("CATALOG_CACHE_STALE_WHILE_REVALIDATE", "300"))
+
+# Purge-by-tag endpoint of the CDN (e.g. Cloudflare's /zones/{zone}/purge_cache)
+CDN_PURGE_URL = os.getenv("CDN_PURGE_URL")
+CDN_PURGE_TOKEN = os.getenv("CDN_PURGE_TOKEN")
+
+# Surrogate key shared by every listing-style response
+CATALOG_SURROGATE_KEY = "products"
+
+
+def product_surrogate_key(product_id: str) -> str:
+    """Surrogate key for responses about one product."""
+    return f"product-{product_id}"
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for an encoded response body."""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches `etag` (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.replace("W/", "", 1) == etag:
+            return True
+    return False
+
+
+def catalog_headers(etag: str, surrogate_keys: List[str], last_modified: float, public: bool = True) -> Dict[str, str]:
+    """Validator and caching headers for a catalog response."""
+    if public:
+        cache_control = f"public, max-age={CATALOG_MAX_AGE}, stale-while-revalidate={CATALOG_STALE_WHILE_REVALIDATE}"
+    else:
+        # Personalized responses may be revalidated by the browser but never shared
+        cache_control = "private, no-cache"
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": cache_control,
+        # The same URL is personalized when a bearer token is sent
+        "Vary": "Authorization",
+        "Surrogate-Key": " ".join(surrogate_keys),
+        "Cache-Tag": ",".join(surrogate_keys),
+    }
+
+
+async def purge_surrogate_keys(surrogate_keys: List[str]) -> None:
+    """Ask the CDN to drop every cached response tagged with these keys."""
+    if not CDN_PURGE_URL or not surrogate_keys:
+        return
+    headers = {"Authorization": f"Bearer {CDN_PURGE_TOKEN}"} if CDN_PURGE_TOKEN else {}
+    try:
+        async with httpx.AsyncClient() as client:
+            response = await client.post(CDN_PURGE_URL, json={"tags": surrogate_keys}, headers=headers, timeout=10.0)
+        if response.status_code >= 400:
+            print(f"⚠️ CDN purge failed for {surrogate_keys}: {response.status_code}")
+    except Exception as e:
+        print(f"⚠️ CDN purge error for {surrogate_keys}: {e}")
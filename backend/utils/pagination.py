@@ -0,0 +1,143 @@
+"""
+Keyset (cursor) pagination helpers for MongoDB list endpoints.
+
+A cursor is an opaque, URL-safe token holding the sort key of the last
+document on the previous page, so page N costs one indexed range scan
+instead of skipping N * limit documents.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+
+# Default sort tuple; (created_at, _id) is unique and backed by an index on every list collection
+DEFAULT_SORT = [("created_at", 1), ("_id", 1)]
+
+# Types a cursor may carry per sort field. Cursors are client-controlled, so anything
+# else (notably a dict, which would inject query operators) is rejected.
+SCALAR_TYPES = (datetime, int, float, str, ObjectId, type(None))
+CURSOR_TYPES = {
+    "created_at": (datetime, type(None)),
+    "_id": (ObjectId,),
+}
+
+
+def encode_cursor(doc: Dict[str, Any], sort_fields: List[Tuple[str, int]] = DEFAULT_SORT) -> str:
+    """Build the cursor pointing just after `doc`."""
+    values = [doc.get(field) for field, _ in sort_fields]
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort_fields: List[Tuple[str, int]] = DEFAULT_SORT) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor`, rejecting malformed tokens."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(sort_fields):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for value, (field, _) in zip(values, sort_fields):
+        if isinstance(value, bool) or not isinstance(value, CURSOR_TYPES.get(field, SCALAR_TYPES)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _after(field: str, direction: int, value: Any) -> Optional[Dict[str, Any]]:
+    """Condition for `field` sorting strictly after `value` (MongoDB sorts null first)."""
+    if direction == 1:
+        return {field: {"$ne": None}} if value is None else {field: {"$gt": value}}
+    if value is None:
+        return None
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(values: List[Any], sort_fields: List[Tuple[str, int]] = DEFAULT_SORT) -> Dict[str, Any]:
+    """Filter matching documents that sort after the given key values."""
+    branches = []
+    for i, (field, direction) in enumerate(sort_fields):
+        after = _after(field, direction, values[i])
+        if after is None:
+            continue
+        branch = {prev_field: values[j] for j, (prev_field, _) in enumerate(sort_fields[:i])}
+        branches.append({"$and": [branch, after]} if branch else after)
+    return {"$or": branches} if branches else {"_id": {"$exists": False}}
+
+
+async def paginate(
+    collection,
+    filter_dict: Dict[str, Any],
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort_fields: List[Tuple[str, int]] = DEFAULT_SORT,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of `collection` in sort-key order.
+
+    With `cursor` the page starts right after the cursor position (keyset);
+    without it `skip` is honoured for backward compatibility. Returns the
+    documents and the `next_cursor` (None on the last page).
+    """
+    limit = max(limit, 1)
+    query = filter_dict
+    if cursor:
+        after = keyset_filter(decode_cursor(cursor, sort_fields), sort_fields)
+        query = {"$and": [filter_dict, after]} if filter_dict else after
+        skip = 0
+
+    find_cursor = collection.find(query, projection).sort(sort_fields)
+    if skip:
+        find_cursor = find_cursor.skip(skip)
+    # One extra document tells us whether another page exists
+    docs = await find_cursor.limit(limit + 1).to_list(length=limit + 1)
+    return _trim_page(docs, limit, sort_fields)
+
+
+async def paginate_with_total(
+    collection,
+    filter_dict: Dict[str, Any],
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort_fields: List[Tuple[str, int]] = DEFAULT_SORT,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+    """
+    Same as `paginate`, plus the total number of documents matching
+    `filter_dict`, computed in the same round trip with `$facet`.
+    """
+    limit = max(limit, 1)
+    page_stages: List[Dict[str, Any]] = []
+    if cursor:
+        page_stages.append({"$match": keyset_filter(decode_cursor(cursor, sort_fields), sort_fields)})
+    elif skip:
+        page_stages.append({"$skip": skip})
+    page_stages.append({"$limit": limit + 1})
+    if projection:
+        page_stages.append({"$project": projection})
+
+    pipeline = [
+        {"$match": filter_dict},
+        {"$sort": dict(sort_fields)},
+        {"$facet": {"page": page_stages, "total": [{"$count": "count"}]}},
+    ]
+    result = await collection.aggregate(pipeline).to_list(length=1)
+    facet = result[0] if result else {"page": [], "total": []}
+    total = facet["total"][0]["count"] if facet["total"] else 0
+    docs, next_cursor = _trim_page(facet["page"], limit, sort_fields)
+    return docs, next_cursor, total
+
+
+def _trim_page(docs: List[Dict[str, Any]], limit: int, sort_fields: List[Tuple[str, int]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Drop the look-ahead document and build the next cursor if there was one."""
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], sort_fields)
+    return docs, next_cursor
@@ -0,0 +1,36 @@
+"""
+Fast JSON responses for the API.
+
+orjson is used when installed (it is in requirements.txt); the stdlib encoder
+is the fallback so a missing wheel never takes the API down.
+"""
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # pragma: no cover - depends on the deployment image
+    orjson = None
+    FastJSONResponse = JSONResponse
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode content to JSON bytes; unknown types (ObjectId, datetime) fall back to str()."""
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode JSON bytes produced by `encode_json`."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def json_bytes_response(body: bytes, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Send an already-encoded JSON body as is, skipping validation and encoding."""
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
@@ -251,7 +251,7 @@ const Actions = styled.div`
   gap: ${theme.spacing[2]};
 `;
 
-const ProductCard = ({ product, onPlay, isPlaying, className, showDownload, onDownload, onLikeToggle, showDownloadButton, isDownloading, canDownload = true, downloadsRemaining = 0, onAuthClick, onAddToCart }) => {
+const ProductCard = ({ product, onPlay, isPlaying, className, showDownload, onDownload, onLikeToggle, showDownloadButton, isDownloading, canDownload = true, downloadsRemaining = 0, onAuthClick, onAddToCart, isLiked, isPurchased }) => {
   const [isFavorite, setIsFavorite] = useState(false);
   const [isPurchasing, setIsPurchasing] = useState(false);
   const [showGuestModal, setShowGuestModal] = useState(false);
@@ -316,14 +316,21 @@ const ProductCard = ({ product, onPlay, isPlaying, className, showDownload, onDo
     }
   }, [product.id, user]);
 
-  // Check if product is liked on mount
+  // Liked state from the grid's ownership lookup (isLiked), when the grid passes one
   React.useEffect(() => {
-    if (isAuthenticated && user) {
+    if (isLiked !== undefined) {
+      setIsFavorite(isLiked);
+    }
+  }, [isLiked]);
+
+  // Otherwise check if product is liked on mount
+  React.useEffect(() => {
+    if (isAuthenticated && user && isLiked === undefined) {
       // Check if product is in user's liked products
       const likedProducts = user.liked_products || [];
       setIsFavorite(likedProducts.includes(product.id));
     }
-  }, [isAuthenticated, user, product.id]);
+  }, [isAuthenticated, user, product.id, isLiked]);
 
   // Image handling
   const handleImageLoad = useCallback(() => {
@@ -339,17 +346,22 @@ const ProductCard = ({ product, onPlay, isPlaying, className, showDownload, onDo
     e.stopPropagation();
     
     // For authenticated users, check if they already purchased this product
+    // (known from the grid's ownership lookup when it passes isPurchased)
     if (isAuthenticated && user) {
-      try {
-        const result = await apiService.checkProductPurchased(product.id);
-        if (result.success && result.data.has_purchased) {
-          // User has already purchased this product, show duplicate purchase modal
-          setShowDuplicateModal(true);
-          return;
+      let hasPurchased = isPurchased;
+      if (hasPurchased === undefined) {
+        try {
+          const result = await apiService.checkProductPurchased(product.id);
+          hasPurchased = result.success && result.data.has_purchased;
+        } catch (error) {
+          console.error('❌ Error checking product purchase:', error);
+          // Continue with normal flow if check fails
         }
-      } catch (error) {
-        console.error('❌ Error checking product purchase:', error);
-        // Continue with normal flow if check fails
+      }
+      if (hasPurchased) {
+        // User has already purchased this product, show duplicate purchase modal
+        setShowDuplicateModal(true);
+        return;
       }
     }
     
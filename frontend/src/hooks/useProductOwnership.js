@@ -0,0 +1,54 @@
+import { useEffect, useState } from 'react';
+import apiService from '../services/api';
+import { useAuth } from '../contexts/AuthContext';
+
+// The API accepts at most this many product ids per ownership request
+const MAX_OWNERSHIP_PRODUCTS = 100;
+
+/**
+ * Purchased/liked flags for every product shown on a page: ownership[productId] = { purchased, liked }.
+ * Products that already carry is_purchased/is_liked (authenticated listings) are used as they are;
+ * the others are checked in one POST /profile/ownership request instead of one request per card.
+ */
+const useProductOwnership = (products) => {
+  const { isAuthenticated } = useAuth();
+  const [ownership, setOwnership] = useState({});
+  const productIds = [...new Set(products.map(product => product.id))].join(',');
+
+  useEffect(() => {
+    if (!isAuthenticated) {
+      setOwnership({});
+      return undefined;
+    }
+
+    const known = {};
+    const unknown = [];
+    products.forEach((product) => {
+      if (product.is_purchased !== undefined && product.is_liked !== undefined) {
+        known[product.id] = { purchased: product.is_purchased, liked: product.is_liked };
+      } else if (!unknown.includes(product.id)) {
+        unknown.push(product.id);
+      }
+    });
+    setOwnership(known);
+    if (unknown.length === 0) {
+      return undefined;
+    }
+
+    let cancelled = false;
+    apiService.getProductOwnership(unknown.slice(0, MAX_OWNERSHIP_PRODUCTS)).then((result) => {
+      if (!cancelled && result.success) {
+        setOwnership({ ...known, ...result.data.ownership });
+      }
+    });
+    return () => {
+      cancelled = true;
+    };
+    // productIds stands in for products: re-check only when the set of shown products changes
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [isAuthenticated, productIds]);
+
+  return ownership;
+};
+
+export default useProductOwnership;
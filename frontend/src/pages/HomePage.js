@@ -15,6 +15,7 @@ import { theme } from '../theme';
 import apiService from '../services/api';
 import { useAudio } from '../contexts/AudioContext';
 import { useAuth } from '../contexts/AuthContext';
+import useProductOwnership from '../hooks/useProductOwnership';
 import ProductCard from '../components/product/ProductCard';
 import Button from '../components/common/Button';
 import SEOHead from '../components/common/SEOHead';
@@ -267,6 +268,8 @@ const HomePage = ({ onAuthClick }) => {
   const [featuredProducts, setFeaturedProducts] = useState([]);
   const [bestsellers, setBestsellers] = useState([]);
   const [newProducts, setNewProducts] = useState([]);
+  // One purchased/liked lookup for all three grids instead of one per card
+  const ownership = useProductOwnership([...featuredProducts, ...bestsellers, ...newProducts]);
   const [downloading] = useState({});
   const [categoryCounts, setCategoryCounts] = useState({
     sample_packs: 0,
@@ -357,7 +360,7 @@ const HomePage = ({ onAuthClick }) => {
     };
 
     loadProducts();
-  }, []);
+  }, [isAuthenticated]);
 
 
   const handleLikeToggle = (productId) => {
@@ -522,6 +525,8 @@ const HomePage = ({ onAuthClick }) => {
                 product={product}
                 onAuthClick={onAuthClick}
                 onAddToCart={handleAddToCart}
+                isLiked={ownership[product.id]?.liked}
+                isPurchased={ownership[product.id]?.purchased}
               />
             ))}
           </ProductGrid>
@@ -554,6 +559,8 @@ const HomePage = ({ onAuthClick }) => {
                 product={product}
                 onAuthClick={onAuthClick}
                 onAddToCart={handleAddToCart}
+                isLiked={ownership[product.id]?.liked}
+                isPurchased={ownership[product.id]?.purchased}
               />
             ))}
           </ProductGrid>
@@ -582,8 +589,9 @@ const HomePage = ({ onAuthClick }) => {
                 onLikeToggle={handleLikeToggle}
                 onAddToCart={handleAddToCart}
                 onDownload={handleDownload}
-                isLiked={product.isLiked}
-                showDownload={product.isPurchased}
+                isLiked={ownership[product.id]?.liked}
+                isPurchased={ownership[product.id]?.purchased}
+                showDownload={ownership[product.id]?.purchased}
                 isDownloading={downloading[product.id]}
                 onAuthClick={onAuthClick}
                 canDownload={product.canDownload}
@@ -6,6 +6,7 @@ import apiService from '../services/api';
 import ProductCard from '../components/product/ProductCard';
 import SEOHead from '../components/common/SEOHead';
 import { useAudio } from '../contexts/AudioContext';
+import useProductOwnership from '../hooks/useProductOwnership';
 
 const PageContainer = styled.div`
   min-height: 100vh;
@@ -38,6 +39,8 @@ const MidiPacksPage = ({ onAuthClick }) => {
   const [midiPacks, setMidiPacks] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  // One purchased/liked lookup for the whole page instead of one per card
+  const ownership = useProductOwnership(midiPacks);
 
   // Load products from API
   React.useEffect(() => {
@@ -104,6 +107,8 @@ const MidiPacksPage = ({ onAuthClick }) => {
                 isPlaying={isCurrentTrack(product.id) && isTrackPlaying(product.id)}
                 onAuthClick={onAuthClick}
                 onAddToCart={handleAddToCart}
+                isLiked={ownership[product.id]?.liked}
+                isPurchased={ownership[product.id]?.purchased}
               />
             ))}
           </ProductGrid>
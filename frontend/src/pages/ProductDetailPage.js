@@ -266,8 +266,10 @@ const ProductDetailPage = ({ onAuthClick }) => {
         const result = await apiService.getProduct(slug);
         if (result.success) {
           setProduct(result.data);
-          // Check if product is liked by current user
-          if (user && user.liked_products) {
+          // Check if product is liked by current user (authenticated responses carry is_liked)
+          if (user && result.data.is_liked !== undefined) {
+            setIsLiked(result.data.is_liked);
+          } else if (user && user.liked_products) {
             const liked = user.liked_products.some(p => p === result.data.id);
             setIsLiked(liked);
           }
@@ -345,7 +347,7 @@ const ProductDetailPage = ({ onAuthClick }) => {
       
       try {
         setLoadingSamples(true);
-        const result = await apiService.getProductSamples(product.slug);
+        const result = await apiService.getProductSamples(product.slug, true);
         if (result.success) {
           setSamples(result.data || []);
         } else {
@@ -388,17 +390,22 @@ const ProductDetailPage = ({ onAuthClick }) => {
     e.stopPropagation();
     
     // For authenticated users, check if they already purchased this product
+    // (already known when the product was loaded with the user's token)
     if (isAuthenticated && user) {
-      try {
-        const result = await apiService.checkProductPurchased(product.id);
-        if (result.success && result.data.has_purchased) {
-          // User has already purchased this product, show duplicate purchase modal
-          alert('You have already purchased this product. Check your profile for downloads.');
-          return;
+      let hasPurchased = product.is_purchased;
+      if (hasPurchased === undefined) {
+        try {
+          const result = await apiService.checkProductPurchased(product.id);
+          hasPurchased = result.success && result.data.has_purchased;
+        } catch (error) {
+          console.error('❌ Error checking product purchase:', error);
+          // Continue with normal flow if check fails
         }
-      } catch (error) {
-        console.error('❌ Error checking product purchase:', error);
-        // Continue with normal flow if check fails
+      }
+      if (hasPurchased) {
+        // User has already purchased this product, show duplicate purchase modal
+        alert('You have already purchased this product. Check your profile for downloads.');
+        return;
       }
     }
     
@@ -544,8 +551,10 @@ const ProductDetailPage = ({ onAuthClick }) => {
       }
 
       try {
-        // Get preview URL from API
-        const result = await apiService.getSamplePreview(sample.id, product.slug);
+        // Use the preview URL loaded with the samples, falling back to the API
+        const result = sample.preview_url
+          ? { success: true, data: { preview_url: sample.preview_url } }
+          : await apiService.getSamplePreview(sample.id, product.slug);
         if (result.success && result.data.preview_url) {
           const audio = new Audio(result.data.preview_url);
           audio.addEventListener('ended', () => {
@@ -9,6 +9,7 @@ import ProductCard from '../components/product/ProductCard';
 import Button from '../components/common/Button';
 import SEOHead from '../components/common/SEOHead';
 import { useAudio } from '../contexts/AudioContext';
+import useProductOwnership from '../hooks/useProductOwnership';
 
 const PageContainer = styled.div`
   min-height: 100vh;
@@ -195,6 +196,8 @@ const SamplePacksPage = ({ onAuthClick }) => {
   const [samplePacks, setSamplePacks] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  // One purchased/liked lookup for the whole page instead of one per card
+  const ownership = useProductOwnership(samplePacks);
   const [filters, setFilters] = useState({
     genre: [],
     bpm: [],
@@ -415,6 +418,8 @@ const SamplePacksPage = ({ onAuthClick }) => {
               isPlaying={isCurrentTrack(product.id) && isTrackPlaying(product.id)}
               onAuthClick={onAuthClick}
               onAddToCart={handleAddToCart}
+              isLiked={ownership[product.id]?.liked}
+              isPurchased={ownership[product.id]?.purchased}
             />
           ))}
         </ProductGrid>
@@ -280,9 +280,10 @@ class APIService {
     }
   }
 
-  async getProductSamples(productId) {
+  // withPreviews: every sample also carries its preview_url (no per-sample preview request)
+  async getProductSamples(productId, withPreviews = false) {
     try {
-      const response = await this.request(`/products/${productId}/samples`);
+      const response = await this.request(`/products/${productId}/samples${withPreviews ? '?with_previews=true' : ''}`);
       return { success: true, data: response.data };
     } catch (error) {
       console.error('Failed to get product samples:', error);
@@ -501,6 +502,23 @@ class APIService {
 
   // User Profile Methods
 
+  // Purchased/liked flags for many products at once: data.ownership[productId] = { purchased, liked }
+  async getProductOwnership(productIds) {
+    try {
+      const response = await this.request('/profile/ownership', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ product_ids: productIds }),
+      });
+      return { success: true, data: response };
+    } catch (error) {
+      console.error('Failed to check product ownership:', error);
+      return { success: false, error: error.message };
+    }
+  }
+
   async toggleLikeProduct(productId) {
     try {
       const response = await this.request('/profile/toggle-like', {